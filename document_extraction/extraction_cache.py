@@ -0,0 +1,178 @@
+"""
+On-disk cache of per-page extraction results.
+
+Entries are keyed by the SHA-256 of the PDF file, the page number and the extractor
+settings (engine, DPI, language, OCR flags), so re-running any extractor over an
+unchanged file never parses or OCRs it again, while changing a setting or the file
+itself misses cleanly. The cache is a single SQLite file with a size cap and
+least-recently-used eviction; it is safe to share between worker processes.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from src.config import PROJECT_ROOT
+from src.timing_decorator.metrics import get_metrics
+
+DEFAULT_CACHE_PATH = Path(os.getenv("EXTRACTION_CACHE_PATH", PROJECT_ROOT / "data" / "cache" / "extraction.sqlite"))
+DEFAULT_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+_HASH_CHUNK = 1 << 20
+_EVICT_BATCH = 256
+# a hit only rewrites last_access when the stored one is older than this; LRU order
+# at this granularity is enough, and most hits then take no write lock at all
+_TOUCH_INTERVAL = 60.0
+
+
+def file_sha256(file_path: Union[Path, str]) -> str:
+    """Stream a file through SHA-256 without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    SQLite-backed LRU cache for page extraction results.
+
+    Example usage:
+    ----------------
+    cache = ExtractionCache()
+    digest = cache.file_digest("inputs/book.pdf")
+    key = cache.page_key(digest, 12, {"engine": "tesseract", "dpi": 600, "lang": "pol"})
+    text = cache.get(key)
+    if text is None:
+        text = run_ocr(...)
+        cache.put(key, text)
+    """
+
+    def __init__(self, path: Union[Path, str] = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param path: SQLite file holding the cache (created if missing)
+        :param max_bytes: total size of stored values above which the oldest entries are evicted
+        """
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_access ON pages(last_access);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta (id, total) VALUES (0, 0);
+            CREATE TRIGGER IF NOT EXISTS pages_ins AFTER INSERT ON pages
+                BEGIN UPDATE meta SET total = total + NEW.size WHERE id = 0; END;
+            CREATE TRIGGER IF NOT EXISTS pages_del AFTER DELETE ON pages
+                BEGIN UPDATE meta SET total = total - OLD.size WHERE id = 0; END;
+            """
+        )
+
+    def file_digest(self, file_path: Union[Path, str]) -> str:
+        """
+        Return the SHA-256 of a file, re-hashing only when its size or mtime changed.
+        """
+        path = Path(file_path).resolve()
+        stat = path.stat()
+        row = self._conn.execute(
+            "SELECT sha256 FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (str(path), stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row:
+            return row[0]
+        digest = file_sha256(path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (str(path), stat.st_size, stat.st_mtime_ns, digest),
+        )
+        return digest
+
+    @staticmethod
+    def page_key(file_digest: str, page_num: int, settings: Dict[str, Any]) -> str:
+        """Build the cache key for one page extracted with the given settings."""
+        payload = json.dumps({"file": file_digest, "page": page_num, "settings": settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key` (refreshing its LRU position), or None."""
+        row = self._conn.execute("SELECT value, last_access FROM pages WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            get_metrics().count("extraction_cache_total", result="miss")
+            return None
+        self.hits += 1
+        get_metrics().count("extraction_cache_total", result="hit")
+        now = time.time()
+        if now - row[1] > _TOUCH_INTERVAL:
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-serialisable value, evicting least-recently-used entries over the size cap."""
+        data = json.dumps(value, ensure_ascii=False)
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self._conn.execute(
+                "INSERT INTO pages (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), time.time()),
+            )
+        self._evict()
+
+    def total_bytes(self) -> int:
+        return self._conn.execute("SELECT total FROM meta WHERE id = 0").fetchone()[0]
+
+    def _evict(self) -> None:
+        while self.total_bytes() > self.max_bytes:
+            self._conn.execute(
+                "DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY last_access LIMIT ?)",
+                (_EVICT_BATCH,),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ExtractionCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_OPEN_CACHES: Dict[str, ExtractionCache] = {}
+
+
+def open_cache(path: Union[Path, str, None], max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[ExtractionCache]:
+    """Return a per-process cache instance for `path` (None disables caching)."""
+    if path is None:
+        return None
+    key = str(path)
+    if key not in _OPEN_CACHES:
+        _OPEN_CACHES[key] = ExtractionCache(path, max_bytes)
+    return _OPEN_CACHES[key]
+
+
+def cache_config(cache: Optional[ExtractionCache]) -> Optional[Tuple[str, int]]:
+    """Picklable description of a cache, for re-opening it inside worker processes."""
+    return (str(cache.path), cache.max_bytes) if cache is not None else None
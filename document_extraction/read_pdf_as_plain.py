@@ -4,9 +4,10 @@ import os
 import string
 import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import fitz
-from typing import Union, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Union, Optional
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent  # project folder
 if str(PROJECT_ROOT) not in sys.path:
@@ -18,6 +19,8 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.insert(0, project_root)
 
 from src.logger.document_reader import document_logger
+from document_extraction.extraction_cache import ExtractionCache, cache_config, file_sha256, open_cache
+from src.timing_decorator.metrics import enable_metrics, get_metrics
 
 # set logger to debug level
 document_logger.setLevel(
@@ -47,10 +50,11 @@ def get_json_depth(obj, level=1):
         return level
 
 
-def save_content_to_file(content: Union[str, dict, list], file_path: Union[Path, str]):
+def save_content_to_file(content: Union[str, dict, list], file_path: Union[Path, str], indent: Optional[int] = None):
     """
     Save content to a file, automatically handling JSON or plain text.
-    For JSON files, indent is dynamic based on structure depth.
+    For JSON files, indent is dynamic based on structure depth unless `indent` is given,
+    in which case the recursive depth pass is skipped.
     """
     path = Path(file_path)
     try:
@@ -64,9 +68,10 @@ def save_content_to_file(content: Union[str, dict, list], file_path: Union[Path,
                 except json.JSONDecodeError:
                     raise ValueError("Provided string is not valid JSON.")
 
-            # Dynamic indent: deeper structures -> larger indent
-            depth = get_json_depth(content)
-            indent = min(max(depth, 2), 8)  # keep indent between 2 and 8
+            if indent is None:
+                # Dynamic indent: deeper structures -> larger indent
+                depth = get_json_depth(content)
+                indent = min(max(depth, 2), 8)  # keep indent between 2 and 8
 
             with path.open("w", encoding="utf-8") as f:
                 json.dump(content, f, ensure_ascii=False, indent=indent)
@@ -82,12 +87,103 @@ def save_content_to_file(content: Union[str, dict, list], file_path: Union[Path,
     except Exception as e:
         document_logger.exception(f"❌ Failed to save content to {path}: {e}")
 
+def _page_bounds(total_pages: int, start_page: Optional[int], end_page: Optional[int]) -> Tuple[int, int]:
+    """Convert 1-based inclusive page bounds into a clamped 0-based half-open range."""
+    # Defaults: full document
+    start = (start_page or 1) - 1  # convert to 0-based
+    end = end_page or total_pages  # still 1-based here
+
+    # Clamp to valid ranges
+    start = max(0, min(start, total_pages - 1))
+    end = max(1, min(end, total_pages))
+    return start, end
+
+
+def _split_page_range(start: int, end: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """Split [start, end) into consecutive ranges of at most `pages_per_task` pages."""
+    step = max(1, pages_per_task)
+    return [(s, min(s + step, end)) for s in range(start, end, step)]
+
+
+# Extractor settings that make up part of the cache key for text-layer pages
+PLAIN_TEXT_SETTINGS = {"engine": "pymupdf", "mode": "text"}
+
+
+def _extract_page(
+        doc,
+        page_num: int,
+        cache: Optional[ExtractionCache] = None,
+        file_digest: Optional[str] = None,
+        count_page: bool = True,
+) -> dict:
+    """Extract the text layer of a single 0-based page, served from `cache` when possible.
+
+    With `count_page=False` the page is left out of `pdf_pages_total`, for callers that
+    decide its source (text layer or OCR) afterwards.
+    """
+    text = None
+    if cache is not None:
+        key = cache.page_key(file_digest, page_num + 1, PLAIN_TEXT_SETTINGS)
+        text = cache.get(key)
+    metrics = get_metrics()
+    if text is None:
+        with metrics.timer("pdf_page_seconds", source="text"):
+            text = doc[page_num].get_text("text")
+        if cache is not None:
+            cache.put(key, text)
+    if count_page:
+        metrics.count("pdf_pages_total", source="text")
+
+    word_count = count_words_in_text(text)
+
+    document_logger.info(f"--- Page {page_num + 1} has {word_count} words ---")
+    document_logger.debug(text if text.strip() else "[No extractable text]")
+
+    return {
+        "page_num": page_num + 1,
+        "content": text,
+        "word_count": word_count
+    }
+
+
+def _extract_page_range(
+        file_path: str,
+        start: int,
+        end: int,
+        cache_cfg: Optional[Tuple[str, int]] = None,
+        file_digest: Optional[str] = None,
+) -> Tuple[str, int, List[dict], Optional[dict]]:
+    """Worker task: open the PDF independently and extract pages [start, end).
+
+    The page timings and cache counters recorded here are returned as a `drain()`
+    snapshot (None when metrics are off) for the parent to merge.
+    """
+    metrics = get_metrics()
+    cache = open_cache(*cache_cfg) if cache_cfg else None
+    with fitz.open(file_path) as doc:
+        pages = [_extract_page(doc, page_num, cache, file_digest) for page_num in range(start, end)]
+    return file_path, start, pages, metrics.drain() if metrics.enabled else None
+
+
+def _init_worker(collect_metrics: bool) -> None:
+    # a fresh registry, not one inherited from the parent with its counts so far
+    if collect_metrics:
+        enable_metrics()
+
+
+def _default_pages_per_task(n_pages: int, workers: int) -> int:
+    # a few tasks per worker so uneven pages still balance across the pool
+    return max(1, -(-n_pages // (workers * 4)))
+
+
 def read_pdf_as_plain(
         file_path: Union[Path, str],
         output_dir: Union[Path, str] = "./",
         start_page: int = None,
         end_page: int = None,
-
+        workers: int = 1,
+        pages_per_task: Optional[int] = None,
+        cache: Optional[ExtractionCache] = None,
 ) -> Optional[defaultdict]:
     """
     Reads a PDF safely without executing JavaScript and prints text content.
@@ -97,42 +193,33 @@ def read_pdf_as_plain(
         output_dir: dir path to save as JSON
         start_page: 1-based page number to start from (None = start of document).
         end_page: 1-based page number to end at (inclusive) (None = end of document).
+        workers: number of processes; above 1 the page range is split across a process pool.
+        pages_per_task: pages handled per worker task (None = derived from the page count).
+        cache: optional extraction cache; pages of an unchanged file are not re-parsed.
     """
 
     file_path = Path(file_path)
 
+    if workers > 1:
+        contents = read_pdfs_as_plain(
+            [file_path], output_dir, start_page, end_page, workers=workers, pages_per_task=pages_per_task, cache=cache
+        )
+        return contents[str(file_path)]
+
+    file_digest = cache.file_digest(file_path) if cache is not None else None
+
     with fitz.open(file_path) as doc:
         total_pages = len(doc)
         document_logger.info(f"{file_path.suffix[1:].upper()} named {file_path.stem} has {total_pages} pages.")
 
-        # Defaults: full document
-        start = (start_page or 1) - 1  # convert to 0-based
-        end = end_page or total_pages  # still 1-based here
-
-        # Clamp to valid ranges
-        start = max(0, min(start, total_pages - 1))
-        end = max(1, min(end, total_pages))
+        start, end = _page_bounds(total_pages, start_page, end_page)
 
         content = defaultdict(list)
         content["title"] = file_path.stem
 
         for page_num in range(start, end):
-            page = doc[page_num]
-            text = page.get_text("text")
-
-            word_count = count_words_in_text(text)
-
-            document_logger.info(f"--- Page {page_num + 1} has {word_count} words ---")
-            document_logger.debug(text if text.strip() else "[No extractable text]")
-
-            page_data = {
-                "page_num": page_num + 1,
-                "content": text,
-                "word_count": word_count
-            }
-
             # Append page data to the "pages" list
-            content["pages"].append(page_data)
+            content["pages"].append(_extract_page(doc, page_num, cache, file_digest))
 
         # Write everything to JSON at once
         output_file = Path(output_dir) / f"{file_path.stem}.json"
@@ -140,19 +227,254 @@ def read_pdf_as_plain(
 
         return content
 
+
+def read_pdfs_as_plain(
+        file_paths: Iterable[Union[Path, str]],
+        output_dir: Union[Path, str] = "./",
+        start_page: int = None,
+        end_page: int = None,
+        workers: Optional[int] = None,
+        pages_per_task: Optional[int] = None,
+        cache: Optional[ExtractionCache] = None,
+) -> Dict[str, defaultdict]:
+    """
+    Extract many PDFs at once, scheduling the pages of all of them across one shared process pool.
+
+    Each worker task opens its own `fitz` document and extracts a contiguous page range;
+    results are merged back, in page order, into the same structure `read_pdf_as_plain` returns.
+
+    Parameters:
+        file_paths: PDF files to extract.
+        output_dir: dir path to save one JSON per PDF.
+        start_page / end_page: 1-based inclusive bounds applied to every PDF (None = whole document).
+        workers: pool size (None = number of CPUs).
+        pages_per_task: pages handled per worker task (None = derived from the total page count).
+        cache: optional extraction cache shared by all workers.
+
+    Returns:
+        Mapping of the given file path (as str) -> extracted content.
+    """
+    workers = workers or os.cpu_count() or 1
+    paths = [Path(p) for p in file_paths]
+
+    ranges: Dict[str, Tuple[int, int]] = {}
+    digests: Dict[str, Optional[str]] = {}
+    for path in paths:
+        digests[str(path)] = cache.file_digest(path) if cache is not None else None
+        with fitz.open(path) as doc:
+            total_pages = len(doc)
+        document_logger.info(f"{path.suffix[1:].upper()} named {path.stem} has {total_pages} pages.")
+        ranges[str(path)] = _page_bounds(total_pages, start_page, end_page)
+
+    if pages_per_task is None:
+        pages_per_task = _default_pages_per_task(sum(e - s for s, e in ranges.values()), workers)
+
+    metrics = get_metrics()
+    pages_by_file: Dict[str, Dict[int, List[dict]]] = {key: {} for key in ranges}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(metrics.enabled,)) as executor:
+        futures = [
+            executor.submit(_extract_page_range, key, s, e, cache_config(cache), digests[key])
+            for key, (start, end) in ranges.items()
+            for s, e in _split_page_range(start, end, pages_per_task)
+        ]
+        for future in as_completed(futures):
+            key, start, pages, snapshot = future.result()
+            pages_by_file[key][start] = pages
+            if snapshot is not None:
+                metrics.merge(snapshot)
+
+    contents: Dict[str, defaultdict] = {}
+    for path in paths:
+        key = str(path)
+        content = defaultdict(list)
+        content["title"] = path.stem
+        for start in sorted(pages_by_file[key]):
+            content["pages"].extend(pages_by_file[key][start])
+
+        output_file = Path(output_dir) / f"{path.stem}.json"
+        save_content_to_file(content, output_file)
+        contents[key] = content
+
+    return contents
+
+
+def _resume_point(path: Path, header: dict) -> Optional[int]:
+    """
+    Return the last fully written page number in a JSONL page file (0 if no page is complete yet).
+
+    None means there is nothing to resume: the file is missing, or its header record does not
+    match `header` (it was extracted from another PDF or page range) and must be started over.
+    A trailing partial record left behind by a crash is truncated away so appending can continue.
+    """
+    if not path.exists():
+        return None
+
+    last_page = 0
+    good_bytes = 0
+    with path.open("rb") as f:
+        first = f.readline()
+        try:
+            found = json.loads(first).get("header") if first.endswith(b"\n") else None
+        except (json.JSONDecodeError, AttributeError):
+            found = None
+        if found != header:
+            document_logger.warning(f"{path} was not extracted from this PDF and page range; starting over")
+            return None
+        good_bytes = len(first)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            last_page = record.get("page_num", last_page)
+            good_bytes += len(line)
+
+    if good_bytes < path.stat().st_size:
+        document_logger.warning(f"Truncating incomplete record at the end of {path}")
+        with path.open("r+b") as f:
+            f.truncate(good_bytes)
+    return last_page
+
+
+def stream_pdf_as_plain(
+        file_path: Union[Path, str],
+        output_dir: Union[Path, str] = "./",
+        start_page: int = None,
+        end_page: int = None,
+        resume: bool = True,
+        workers: int = 1,
+        pages_per_task: Optional[int] = None,
+        cache: Optional[ExtractionCache] = None,
+) -> Path:
+    """
+    Extract a PDF page by page straight to a JSONL file, one record per page.
+
+    Each record is written and flushed as soon as its page is extracted, so memory stays flat
+    and a crash only loses the page in progress. With `resume=True` an existing output file
+    is continued after its last completed page, provided its header record (the SHA-256 of
+    the PDF and the page range) matches this call; otherwise the file is started over.
+
+    Parameters:
+        file_path: Path to the PDF file.
+        output_dir: dir path for `<stem>.jsonl`.
+        start_page / end_page: 1-based inclusive bounds (None = whole document).
+        resume: continue an existing output file instead of overwriting it.
+        workers: number of processes; page ranges are still written in page order.
+        pages_per_task: pages handled per worker task (None = derived from the page count).
+        cache: optional extraction cache; pages of an unchanged file are not re-parsed.
+
+    Returns:
+        Path of the JSONL file.
+    """
+    file_path = Path(file_path)
+    output_file = Path(output_dir) / f"{file_path.stem}.jsonl"
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with fitz.open(file_path) as doc:
+        total_pages = len(doc)
+    document_logger.info(f"{file_path.suffix[1:].upper()} named {file_path.stem} has {total_pages} pages.")
+    start, end = _page_bounds(total_pages, start_page, end_page)
+
+    file_digest = cache.file_digest(file_path) if cache is not None else file_sha256(file_path)
+    header = {"sha256": file_digest, "start_page": start + 1, "end_page": end}
+
+    last_page = _resume_point(output_file, header) if resume else None
+    if last_page:
+        start = max(start, last_page)  # page_num is 1-based, so this is the next 0-based page
+        document_logger.info(f"Resuming {file_path.stem} after page {last_page}")
+
+    if start >= end:
+        document_logger.info(f"✅ Nothing left to extract for {file_path.stem}")
+        return output_file
+
+    title = file_path.stem
+    with output_file.open("a" if last_page is not None else "w", encoding="utf-8") as out:
+        if last_page is None:
+            out.write(json.dumps({"header": header}) + "\n")
+
+        def write(page_data: dict) -> None:
+            out.write(json.dumps({"title": title, **page_data}, ensure_ascii=False) + "\n")
+            out.flush()
+
+        if workers > 1:
+            ranges = _split_page_range(start, end, pages_per_task or _default_pages_per_task(end - start, workers))
+            metrics = get_metrics()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(metrics.enabled,)) as executor:
+                futures = [
+                    executor.submit(_extract_page_range, str(file_path), s, e, cache_config(cache), file_digest)
+                    for s, e in ranges
+                ]
+                # consume in submission order so pages are appended in order
+                for future in futures:
+                    _, _, pages, snapshot = future.result()
+                    if snapshot is not None:
+                        metrics.merge(snapshot)
+                    for page_data in pages:
+                        write(page_data)
+        else:
+            with fitz.open(file_path) as doc:
+                for page_num in range(start, end):
+                    write(_extract_page(doc, page_num, cache, file_digest))
+
+    document_logger.info(f"✅ Successfully streamed pages to {output_file}")
+    return output_file
+
+
+def iter_pages(file_path: Union[Path, str]) -> Iterator[dict]:
+    """
+    Lazily yield page records from extracted output.
+
+    `.jsonl` files (from `stream_pdf_as_plain`) are read one line at a time, skipping their
+    header record; legacy `.json` files (from `read_pdf_as_plain`) are loaded and their
+    "pages" list is yielded.
+    """
+    path = Path(file_path)
+    if path.suffix.lower() == ".jsonl":
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    if "header" not in record:
+                        yield record
+    else:
+        with path.open("r", encoding="utf-8") as f:
+            yield from json.load(f).get("pages", [])
+
+
 def main():
     parser = argparse.ArgumentParser(
         prog='ReadPDFasPlainText',
         description='Reads PDF and saves to file'
     )
 
-    parser.add_argument('filename')
+    parser.add_argument('filenames', nargs='+')
     parser.add_argument('output')
+    parser.add_argument('--workers', type=int, default=1, help='Number of extraction processes (default: 1)')
+    parser.add_argument('--pages-per-task', type=int, default=None, help='Pages handled per worker task')
+    parser.add_argument('--jsonl', action='store_true', help='Stream one JSONL record per page as it is extracted')
+    parser.add_argument('--no-resume', action='store_true', help='With --jsonl, overwrite instead of resuming')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the extraction cache')
 
     args = parser.parse_args()
-    filepath = args.filename
-
-    read_pdf_as_plain(filepath, output_dir=Path(PROJECT_ROOT / "/data/extracted_jsons"))
+    output_dir = Path(PROJECT_ROOT / "/data/extracted_jsons")
+    cache = None if args.no_cache else ExtractionCache()
+
+    if args.jsonl:
+        for filename in args.filenames:
+            stream_pdf_as_plain(
+                filename, output_dir, resume=not args.no_resume,
+                workers=args.workers, pages_per_task=args.pages_per_task, cache=cache
+            )
+    elif len(args.filenames) > 1 or args.workers > 1:
+        read_pdfs_as_plain(
+            args.filenames, output_dir, workers=args.workers, pages_per_task=args.pages_per_task, cache=cache
+        )
+    else:
+        read_pdf_as_plain(args.filenames[0], output_dir=output_dir, cache=cache)
 
 if __name__ == '__main__':
     main()
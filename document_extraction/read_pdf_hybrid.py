@@ -0,0 +1,187 @@
+"""
+Hybrid PDF extraction: use the PyMuPDF text layer wherever it exists and OCR only the pages without it.
+
+Every page is first read through its text layer and scored with `count_words_in_text`. Pages that
+are empty or fall below `min_words` (typically scanned pages in an otherwise born-digital PDF)
+are rendered with PyMuPDF and sent to Tesseract; all other pages are never rendered at all.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import fitz
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent  # project folder
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import PROJECT_ROOT
+from src.logger.document_reader import document_logger
+from document_extraction.extraction_cache import ExtractionCache
+from src.timing_decorator.metrics import get_metrics
+from document_extraction.read_pdf_as_plain import (
+    _extract_page,
+    _page_bounds,
+    count_words_in_text,
+    save_content_to_file,
+)
+
+DEFAULT_MIN_WORDS = 20
+DPI = 600
+LANG = "pol"
+
+
+def needs_ocr(word_count: int, min_words: int = DEFAULT_MIN_WORDS) -> bool:
+    """A page goes to OCR when its text layer is empty or has fewer than `min_words` words."""
+    return word_count < min_words
+
+
+def ocr_settings(dpi: int, lang: str) -> dict:
+    """Extractor settings for OCR'd pages, used as part of the cache key."""
+    return {"engine": "tesseract", "renderer": "pymupdf", "dpi": dpi, "lang": lang}
+
+
+def _ocr_page(file_path: str, page_num: int, dpi: int, lang: str) -> Tuple[str, float]:
+    """Render one 0-based page in memory with PyMuPDF and OCR it with Tesseract.
+
+    Returns the text and the seconds it took; pool workers do not share the parent's metrics
+    registry, so the caller records the time.
+    """
+    import pytesseract
+    from PIL import Image
+
+    started = time.perf_counter()
+    with fitz.open(file_path) as doc:
+        pix = doc[page_num].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    text = pytesseract.image_to_string(image, lang=lang)
+    return text, time.perf_counter() - started
+
+
+def read_pdf_hybrid(
+        file_path: Union[Path, str],
+        output_dir: Union[Path, str] = "./",
+        start_page: int = None,
+        end_page: int = None,
+        min_words: int = DEFAULT_MIN_WORDS,
+        dpi: int = DPI,
+        lang: str = LANG,
+        ocr_workers: int = 1,
+        cache: Optional[ExtractionCache] = None,
+) -> Optional[defaultdict]:
+    """
+    Extract a PDF using the text layer, falling back to OCR only for pages that lack one.
+
+    Parameters:
+        file_path: Path to the PDF file.
+        output_dir: dir path to save as JSON
+        start_page: 1-based page number to start from (None = start of document).
+        end_page: 1-based page number to end at (inclusive) (None = end of document).
+        min_words: pages whose text layer has fewer words are OCR'd.
+        dpi: render resolution for OCR'd pages.
+        lang: Tesseract language code.
+        ocr_workers: number of processes used to OCR the routed pages.
+        cache: optional extraction cache for both text-layer and OCR results.
+
+    Returns:
+        The same structure as `read_pdf_as_plain`, with a "source" key ("text" or "ocr") per page.
+    """
+    file_path = Path(file_path)
+    file_digest = cache.file_digest(file_path) if cache is not None else None
+
+    content = defaultdict(list)
+    content["title"] = file_path.stem
+
+    with fitz.open(file_path) as doc:
+        total_pages = len(doc)
+        document_logger.info(f"{file_path.suffix[1:].upper()} named {file_path.stem} has {total_pages} pages.")
+        start, end = _page_bounds(total_pages, start_page, end_page)
+
+        for page_num in range(start, end):
+            page_data = _extract_page(doc, page_num, cache, file_digest, count_page=False)
+            page_data["source"] = "ocr" if needs_ocr(page_data["word_count"], min_words) else "text"
+            content["pages"].append(page_data)
+
+    ocr_pages: List[dict] = [p for p in content["pages"] if p["source"] == "ocr"]
+    document_logger.info(
+        f"{len(ocr_pages)} of {len(content['pages'])} page(s) have fewer than {min_words} words and will be OCR'd"
+    )
+
+    # Serve what we can from the cache, OCR the rest
+    settings = ocr_settings(dpi, lang)
+    keys: Dict[int, str] = {}
+    pending: List[dict] = []
+    for page_data in ocr_pages:
+        text = None
+        if cache is not None:
+            keys[page_data["page_num"]] = cache.page_key(file_digest, page_data["page_num"], settings)
+            text = cache.get(keys[page_data["page_num"]])
+        if text is None:
+            pending.append(page_data)
+        else:
+            page_data["content"] = text
+
+    # every page is counted once, under the source it ends up with
+    metrics = get_metrics()
+    metrics.count("pdf_pages_total", len(content["pages"]) - len(ocr_pages), source="text")
+    metrics.count("pdf_pages_total", len(ocr_pages), source="ocr")
+    if ocr_workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=ocr_workers) as executor:
+            futures = [
+                executor.submit(_ocr_page, str(file_path), p["page_num"] - 1, dpi, lang) for p in pending
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [_ocr_page(str(file_path), p["page_num"] - 1, dpi, lang) for p in pending]
+
+    for page_data, (text, elapsed) in zip(pending, results):
+        metrics.observe("pdf_page_seconds", elapsed, source="ocr")
+        page_data["content"] = text
+        if cache is not None:
+            cache.put(keys[page_data["page_num"]], text)
+
+    for page_data in ocr_pages:
+        page_data["word_count"] = count_words_in_text(page_data["content"])
+        document_logger.info(f"--- Page {page_data['page_num']} (OCR) has {page_data['word_count']} words ---")
+
+    output_file = Path(output_dir) / f"{file_path.stem}.json"
+    save_content_to_file(content, output_file)
+
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='ReadPDFHybrid',
+        description='Reads PDF via its text layer, OCRs only pages without extractable text, and saves to file'
+    )
+
+    parser.add_argument('filename')
+    parser.add_argument('--output-dir', default=str(PROJECT_ROOT / "data" / "extracted_jsons"))
+    parser.add_argument('--min-words', type=int, default=DEFAULT_MIN_WORDS, help='OCR pages with fewer words than this')
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--lang', default=LANG, help='Tesseract language code')
+    parser.add_argument('--ocr-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the extraction cache')
+
+    args = parser.parse_args()
+    cache = None if args.no_cache else ExtractionCache()
+
+    read_pdf_hybrid(
+        args.filename,
+        args.output_dir,
+        min_words=args.min_words,
+        dpi=args.dpi,
+        lang=args.lang,
+        ocr_workers=args.ocr_workers,
+        cache=cache,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,40 +1,186 @@
-import pytesseract
-from pdf2image import convert_from_path
+"""
+Tesseract OCR over a process pool with bounded memory.
+
+Each worker renders and OCRs a single page at a time, and at most `window` pages are in flight,
+so peak memory is a few page images regardless of the book length. Page texts are consumed in
+page order and the numbered-line output is streamed to disk as they arrive.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
+from typing import Deque, Iterator, Optional, Tuple, Union
+
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent  # project folder
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
 from src.logger.document_reader import document_logger
+from document_extraction.extraction_cache import ExtractionCache
+from src.timing_decorator.metrics import get_metrics
 
 INPUT_PDF = Path("../inputs/file.pdf")
 OUTPUT_TXT = Path("../loaded_data/output.txt")
 DPI = 600
 LANG = "pol"
+NUMBER_WIDTH = 6
+
+
+def tesseract_settings(dpi: int, lang: str) -> dict:
+    """Settings that make up part of the extraction cache key."""
+    return {"engine": "tesseract", "dpi": dpi, "lang": lang}
+
+
+def ocr_page(file_path: str, page_number: int, dpi: int = DPI, lang: str = LANG) -> str:
+    """Render a single 1-based page and OCR it; the image never leaves this call."""
+    page = convert_from_path(file_path, dpi, first_page=page_number, last_page=page_number)[0]
+    return pytesseract.image_to_string(page, lang=lang)
+
+
+def _timed_ocr_page(file_path: str, page_number: int, dpi: int, lang: str) -> Tuple[str, float]:
+    """`ocr_page` plus its elapsed seconds, which a pool worker cannot record itself."""
+    started = time.perf_counter()
+    text = ocr_page(file_path, page_number, dpi, lang)
+    return text, time.perf_counter() - started
+
+
+def iter_ocr_pages(
+        file_path: Union[Path, str],
+        dpi: int = DPI,
+        lang: str = LANG,
+        workers: Optional[int] = None,
+        window: Optional[int] = None,
+        start_page: int = None,
+        end_page: int = None,
+        cache: Optional[ExtractionCache] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) in page order, OCR'ing pages across a process pool.
+
+    Parameters:
+        file_path: Path to the PDF file.
+        dpi: render resolution.
+        lang: Tesseract language code.
+        workers: pool size (None = number of CPUs).
+        window: maximum pages in flight (None = 2 * workers); bounds memory.
+        start_page / end_page: 1-based inclusive bounds (None = whole document).
+        cache: optional extraction cache; cached pages are neither rendered nor OCR'd.
+    """
+    file_path = str(file_path)
+    workers = workers or os.cpu_count() or 1
+    window = max(1, window or 2 * workers)
+    total_pages = pdfinfo_from_path(file_path)["Pages"]
+    first = max(1, start_page or 1)
+    last = min(total_pages, end_page or total_pages)
+
+    file_digest = cache.file_digest(file_path) if cache is not None else None
+    settings = tesseract_settings(dpi, lang)
+    metrics = get_metrics()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight: Deque[Tuple[int, Optional[str], Optional[Future]]] = deque()
+
+        def drain_one() -> Tuple[int, str]:
+            page_number, key, future = in_flight.popleft()
+            text, elapsed = future.result()
+            if elapsed is not None:  # None for cached pages, which are already stored
+                metrics.observe("pdf_page_seconds", elapsed, source="ocr")
+                if cache is not None:
+                    cache.put(key, text)
+            return page_number, text
+
+        for page_number in range(first, last + 1):
+            metrics.count("pdf_pages_total", source="ocr")
+            key = cache.page_key(file_digest, page_number, settings) if cache is not None else None
+            text = cache.get(key) if cache is not None else None
+            if text is not None and not in_flight:
+                yield page_number, text
+                continue
+            if text is not None:
+                # keep page order: queue the cached text behind the pages still being OCR'd
+                done: Future = Future()
+                done.set_result((text, None))
+                in_flight.append((page_number, key, done))
+            else:
+                in_flight.append((page_number, key, executor.submit(_timed_ocr_page, file_path, page_number, dpi, lang)))
+            while len(in_flight) >= window:
+                yield drain_one()
+
+        while in_flight:
+            yield drain_one()
+
+
+def read_pdf_tesseract(
+        file_path: Union[Path, str],
+        output_txt: Union[Path, str] = OUTPUT_TXT,
+        dpi: int = DPI,
+        lang: str = LANG,
+        workers: Optional[int] = None,
+        window: Optional[int] = None,
+        number_width: int = NUMBER_WIDTH,
+        cache: Optional[ExtractionCache] = None,
+) -> int:
+    """
+    OCR a whole PDF and stream its numbered lines to `output_txt` in page order.
+
+    Lines are the same as splitting the newline-joined page texts; numbers are zero-padded to
+    `number_width` digits since the total is not known up front.
+
+    Returns:
+        Number of lines written.
+    """
+    path = Path(output_txt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    last_page = pdfinfo_from_path(str(file_path))["Pages"]
+
+    n_lines = 0
+    with path.open("w", encoding="utf-8") as f:
+        for page_number, text in iter_ocr_pages(file_path, dpi, lang, workers, window, cache=cache):
+            # pages are joined with "\n", so every page but the last ends with a line break
+            if page_number < last_page:
+                text += "\n"
+            for line in text.splitlines():
+                n_lines += 1
+                f.write(f"{n_lines:0{number_width}d}: {line.rstrip()}\n")
+            document_logger.info(f"📄 Page {page_number} OCR'd")
+
+    document_logger.info(f"✅ {n_lines} lines written successfully to {path.resolve()}")
+    return n_lines
 
-def write_numbered_lines(path: Path, lines):
-    """Write numbered lines to file at 'path'."""
-    try:
-        width = len(str(len(lines)))
-        path.parent.mkdir(parents=True, exist_ok=True)
 
-        with path.open("w", encoding="utf-8") as f:
-            for idx, line in enumerate(lines, start=1):
-                f.write(f"{idx:0{width}d}: {line.rstrip()}\n")
+def main():
+    parser = argparse.ArgumentParser(
+        prog='ReadPDFTesseract',
+        description='OCR a PDF with Tesseract across a process pool and write numbered lines'
+    )
 
-        document_logger.info(f"✅ {len(lines)} lines written successfully to {path.resolve()}")
-    except FileNotFoundError:
-        document_logger.error(f"❌ Directory not found: {path.parent}")
-    except PermissionError:
-        document_logger.error(f"❌ Permission denied when writing to: {path}")
-    except Exception as e:
-        document_logger.error(f"❌ An unexpected error occurred: {e}")
+    parser.add_argument('filename', nargs='?', default=str(INPUT_PDF))
+    parser.add_argument('--output', default=str(OUTPUT_TXT))
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--lang', default=LANG, help='Tesseract language code')
+    parser.add_argument('--workers', type=int, default=None, help='OCR processes (default: number of CPUs)')
+    parser.add_argument('--window', type=int, default=None, help='Maximum pages in flight (default: 2 * workers)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the extraction cache')
 
-# Convert PDF to images
-pages = convert_from_path(INPUT_PDF, DPI)
+    args = parser.parse_args()
+    cache = None if args.no_cache else ExtractionCache()
 
-# Extract text from each page
-full_text = "\n".join(
-    pytesseract.image_to_string(page, lang=LANG) for page in pages
-)
+    read_pdf_tesseract(
+        args.filename,
+        args.output,
+        dpi=args.dpi,
+        lang=args.lang,
+        workers=args.workers,
+        window=args.window,
+        cache=cache,
+    )
 
-lines = full_text.splitlines()
 
-# Write numbered lines to file
-write_numbered_lines(OUTPUT_TXT, lines)
+if __name__ == '__main__':
+    main()
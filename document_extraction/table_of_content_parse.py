@@ -1,12 +1,26 @@
 import json
 import ollama
+from itertools import islice
 from pathlib import Path
 
+from document_extraction.read_pdf_as_plain import iter_pages
+from src.llm_extraction.response_cache import CachedOllamaClient, ResponseCache
+
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
+_client = None
+
+
+def get_client():
+    """Ollama client with an on-disk response cache (set LLM_CACHE_BYPASS=1 to re-query)."""
+    global _client
+    if _client is None:
+        _client = CachedOllamaClient(ollama.Client(), ResponseCache())
+    return _client
+
 
-def process_page(page_json):
+def process_page(page_json, client=None):
     """
     Send page JSON to Ollama model and return judgment/structure.
     """
@@ -21,7 +35,7 @@ Section | Subsection | Page Start | Page End
 If no, return "NOT USEFUL".
     """
 
-    response = ollama.chat(
+    response = (client or get_client()).chat(
         model="book-structure",
         messages=[{"role": "user", "content": prompt}],
     )
@@ -29,13 +43,15 @@ If no, return "NOT USEFUL".
 
 
 if __name__ == "__main__":
-    with open(PROJECT_ROOT / "data" / "extracted_jsons" / "HRCTofTheLung.json", "r", encoding="utf-8") as f:
-        book = json.load(f)
+    extracted = PROJECT_ROOT / "data" / "extracted_jsons" / "HRCTofTheLung.jsonl"
+    if not extracted.exists():
+        extracted = extracted.with_suffix(".json")
 
     all_results = []
-    pages = book.get('pages')
+    # pages are read back lazily, one record at a time
+    pages = iter_pages(extracted)
     # debug only
-    pages = pages[10:]
+    pages = islice(pages, 10, None)
 
     for page in pages:
         result = process_page(page)
@@ -47,6 +63,7 @@ if __name__ == "__main__":
             pass
 
     (PROJECT_ROOT / "book_structure.md").write_text("\n\n".join(all_results))
+    print(f"LLM cache: {get_client().cache.hits} hit(s), {get_client().cache.misses} miss(es)")
 
     # import markdown
     # html_output = markdown.markdown(markdown_table_string)
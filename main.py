@@ -1,9 +1,11 @@
 import ollama
 from document_extraction.read_pdf_as_plain import read_pdf_as_plain
+from src.llm_extraction.response_cache import CachedOllamaClient, ResponseCache
 from src.timing_decorator.timer import measure_time
 
 
-client = ollama.Client()
+# identical prompts are answered from the on-disk cache (set LLM_CACHE_BYPASS=1 to re-query)
+client = CachedOllamaClient(ollama.Client(), ResponseCache())
 
 @measure_time
 def generate_response(client, model, prompt):
@@ -58,9 +60,9 @@ prompt = questions
 # print(f"Response from Ollama \n{response.response}")
 
 
-import mysql.connector
+from src.mysql_db import MySQLDatabase
 
-conn = mysql.connector.connect(
+db = MySQLDatabase(
     host="127.0.0.1",
     user="user",
     password="UserP@ssword",
@@ -68,8 +70,5 @@ conn = mysql.connector.connect(
     port=3306
 )
 
-cursor = conn.cursor()
-cursor.execute("SHOW TABLES;")
-print(cursor.fetchall())
+print(db.fetch_all("SHOW TABLES"))
 print("after fetchall")
-conn.close()
@@ -0,0 +1,9 @@
+from .response_cache import CachedOllamaClient, ResponseCache
+from .sentence_to_cypher import SentenceToCypherExtractor, read_modelfile_parameters
+
+__all__ = [
+    "CachedOllamaClient",
+    "ResponseCache",
+    "SentenceToCypherExtractor",
+    "read_modelfile_parameters",
+]
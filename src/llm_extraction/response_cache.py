@@ -0,0 +1,207 @@
+"""
+Persistent prompt/response cache for Ollama calls.
+
+Responses are stored in a local SQLite file keyed by the model name, a digest of the model's
+Modelfile, the sampling parameters and the prompt, so re-running over the same book serves
+byte-identical requests from disk. Entries are evicted by age and, least-recently-used first,
+by total size. `CachedOllamaClient` wraps any `ollama.Client`-like object and is a drop-in
+replacement for its `generate` and `chat` methods.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.config import PROJECT_ROOT
+from src.timing_decorator.metrics import get_metrics
+
+DEFAULT_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", PROJECT_ROOT / "data" / "cache" / "llm_responses.sqlite"))
+DEFAULT_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 1024 ** 3))
+_EVICT_BATCH = 256
+
+
+class _AttrDict(dict):
+    """Dict that also allows attribute access, like the ollama response objects it stands in for."""
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            value = self[name]
+        except KeyError:
+            raise AttributeError(name)
+        return _AttrDict(value) if isinstance(value, dict) else value
+
+
+def _to_dict(response: Any) -> Dict[str, Any]:
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    return dict(response)
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of model responses with size and age eviction.
+
+    :param path: SQLite file holding the cache (created if missing)
+    :param max_bytes: total stored size above which least-recently-used entries are evicted
+    :param max_age: seconds after which an entry is treated as missing and removed (None = never)
+    :param bypass: skip lookups (every call misses) while still storing fresh responses
+        (None = on when the LLM_CACHE_BYPASS environment variable is set and not "0")
+    """
+
+    def __init__(
+        self,
+        path: Union[Path, str] = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: Optional[float] = None,
+        bypass: Optional[bool] = None,
+    ):
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.max_age = max_age
+        self.bypass = os.getenv("LLM_CACHE_BYPASS", "") not in ("", "0") if bypass is None else bypass
+        self.hits = 0
+        self.misses = 0
+        # one connection shared by the extractor's request threads
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access);
+            CREATE INDEX IF NOT EXISTS responses_created ON responses(created);
+            CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+            CREATE TRIGGER IF NOT EXISTS responses_ins AFTER INSERT ON responses
+                BEGIN UPDATE meta SET total = total + NEW.size WHERE id = 0; END;
+            CREATE TRIGGER IF NOT EXISTS responses_del AFTER DELETE ON responses
+                BEGIN UPDATE meta SET total = total - OLD.size WHERE id = 0; END;
+            """
+        )
+        self.evict()
+
+    @staticmethod
+    def make_key(kind: str, model: str, modelfile_digest: str, request: Dict[str, Any]) -> str:
+        """Hash of the call type, model, Modelfile digest and every request parameter (prompt included)."""
+        payload = json.dumps(
+            {"kind": kind, "model": model, "modelfile": modelfile_digest, "request": request},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.bypass:
+            self.misses += 1
+            get_metrics().count("llm_cache_total", result="miss")
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.max_age is not None and time.time() - row[1] > self.max_age):
+                self.misses += 1
+                get_metrics().count("llm_cache_total", result="miss")
+                return None
+            self.hits += 1
+            get_metrics().count("llm_cache_total", result="hit")
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock, self._conn:
+            # delete + insert rather than REPLACE so both triggers keep the running total
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.execute(
+                "INSERT INTO responses (key, value, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), now, now),
+            )
+        self.evict()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT total FROM meta WHERE id = 0").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def evict(self) -> None:
+        """Drop entries older than `max_age`, then least-recently-used entries above `max_bytes`."""
+        with self._lock:
+            if self.max_age is not None:
+                self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,))
+            while self._total_bytes() > self.max_bytes:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (_EVICT_BATCH,),
+                )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedOllamaClient:
+    """Wrap an `ollama.Client`-like object so `generate` and `chat` are served from a `ResponseCache`.
+
+    Parameters
+    ----------
+    client : object
+        The wrapped client.
+    cache : ResponseCache
+        Where responses are stored.
+    modelfiles : dict, optional
+        Model name -> Modelfile path; its contents are hashed into the key. Models not listed
+        are fingerprinted from `client.show(model)` once per process, when available.
+    """
+
+    def __init__(self, client, cache: ResponseCache, modelfiles: Optional[Dict[str, Union[Path, str]]] = None):
+        self.client = client
+        self.cache = cache
+        self.modelfiles = dict(modelfiles or {})
+        self._digests: Dict[str, str] = {}
+
+    def modelfile_digest(self, model: str) -> str:
+        if model not in self._digests:
+            source = ""
+            if model in self.modelfiles:
+                source = Path(self.modelfiles[model]).read_text(encoding="utf-8")
+            else:
+                try:
+                    source = _to_dict(self.client.show(model)).get("modelfile") or ""
+                except Exception:
+                    source = ""
+            self._digests[model] = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        return self._digests[model]
+
+    def _call(self, kind: str, model: str, request: Dict[str, Any]):
+        key = self.cache.make_key(kind, model, self.modelfile_digest(model), request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return _AttrDict(cached)
+        response = getattr(self.client, kind)(model=model, **request)
+        self.cache.put(key, _to_dict(response))
+        return response
+
+    def generate(self, model: str, prompt: str = "", **kwargs):
+        return self._call("generate", model, {"prompt": prompt, **kwargs})
+
+    def chat(self, model: str, messages=None, **kwargs):
+        return self._call("chat", model, {"messages": messages, **kwargs})
+
+    def __getattr__(self, name: str) -> Any:
+        # everything else (list, show, pull, ...) goes straight to the wrapped client
+        return getattr(self.client, name)
@@ -0,0 +1,247 @@
+"""
+Sentence-batched graph extraction with concurrent Ollama requests.
+
+Sentences are packed into batches that fit the model context window declared in the
+`LLaMA_sentence_to_cypher` Modelfile (`num_ctx`), a configurable number of batches are kept
+in flight on a thread pool, and failed requests are retried with exponential backoff. Sentences whose section is missing
+from a batched answer are asked for again one at a time.
+The client is anything with an `ollama.Client`-style `generate(model=..., prompt=..., options=...)`
+method, so a stub server speaking the Ollama HTTP API can be targeted with
+`ollama.Client(host="http://127.0.0.1:<port>")`.
+
+Example:
+    python -m src.llm_extraction.sentence_to_cypher data/extracted_jsons/book.jsonl --output cypher.jsonl
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Union
+
+from src.config import PROJECT_ROOT
+from src.llm_extraction.response_cache import CachedOllamaClient, ResponseCache
+from src.timing_decorator.metrics import enable_metrics, get_metrics
+
+logger = logging.getLogger(__name__)
+
+MODELFILE_PATH = PROJECT_ROOT / "config" / "LLaMA_sentence_to_cypher" / "Modelfile"
+DEFAULT_MODEL = "sentence-to-cypher"
+
+# rough characters-per-token ratio used to budget the context window without a tokenizer
+CHARS_PER_TOKEN = 3.5
+
+_SENTENCE_HEADER = re.compile(r"^#{2,}\s*Sentence\s+(\d+)\s*$", re.MULTILINE)
+
+
+def read_modelfile_parameters(path: Union[Path, str] = MODELFILE_PATH) -> Dict[str, Any]:
+    """
+    Parse `PARAMETER` lines and the `SYSTEM` prompt of an Ollama Modelfile.
+
+    Returns a dict of parameter name -> value (ints/floats converted), plus "system" when present.
+    """
+    params: Dict[str, Any] = {}
+    text = Path(path).read_text(encoding="utf-8")
+    for line in text.splitlines():
+        parts = line.strip().split(None, 2)
+        if len(parts) == 3 and parts[0].lower() == "parameter":
+            value: Any = parts[2]
+            for cast in (int, float):
+                try:
+                    value = cast(parts[2])
+                    break
+                except ValueError:
+                    continue
+            params[parts[1]] = value
+    system = re.search(r"^system\s+(.+)$", text, re.IGNORECASE | re.MULTILINE)
+    if system:
+        params["system"] = system.group(1).strip().strip('"')
+    return params
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate from character length."""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+class SentenceToCypherExtractor:
+    """Extract per-sentence graph mappings and Cypher with batched, concurrent model calls.
+
+    Parameters
+    ----------
+    client : object
+        Client with a `generate(model=..., prompt=..., options=...)` method (e.g. `ollama.Client`).
+    model : str
+        Name of the model created from the `LLaMA_sentence_to_cypher` Modelfile.
+    max_in_flight : int
+        Number of requests kept in flight concurrently.
+    num_ctx : int, optional
+        Context window in tokens; read from the Modelfile when omitted.
+    output_tokens_per_sentence : int
+        Tokens reserved in the context window for each sentence's answer.
+    max_retries : int
+        Retries per batch before the error is raised.
+    backoff : float
+        Base delay in seconds; doubles after each failed attempt (with jitter).
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str = DEFAULT_MODEL,
+        max_in_flight: int = 4,
+        num_ctx: Optional[int] = None,
+        output_tokens_per_sentence: int = 256,
+        max_retries: int = 4,
+        backoff: float = 0.5,
+        modelfile: Union[Path, str] = MODELFILE_PATH,
+    ) -> None:
+        self.client = client
+        self.model = model
+        self.max_in_flight = max(1, int(max_in_flight))
+        params = read_modelfile_parameters(modelfile) if Path(modelfile).exists() else {}
+        self.num_ctx = int(num_ctx or params.get("num_ctx", 4096))
+        self.system_tokens = estimate_tokens(params.get("system", ""))
+        self.output_tokens_per_sentence = output_tokens_per_sentence
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def build_prompt(self, sentences: List[str]) -> str:
+        numbered = "\n".join(f"{i}. {s}" for i, s in enumerate(sentences, start=1))
+        return (
+            f"Sentences:\n{numbered}\n\n"
+            "Process every sentence independently. For each one, start with a line "
+            "'### Sentence <number>' and then output its three sections as instructed.\n"
+        )
+
+    def pack_batches(self, sentences: Iterable[str]) -> Iterator[List[str]]:
+        """Greedily pack sentences into batches whose prompt and answers fit in `num_ctx`."""
+        budget = self.num_ctx - self.system_tokens - estimate_tokens(self.build_prompt([]))
+        batch: List[str] = []
+        used = 0
+        for sentence in sentences:
+            cost = estimate_tokens(sentence) + self.output_tokens_per_sentence + 4
+            if batch and used + cost > budget:
+                yield batch
+                batch, used = [], 0
+            batch.append(sentence)
+            used += cost
+        if batch:
+            yield batch
+
+    @staticmethod
+    def split_response(response: str, n_sentences: int) -> List[Optional[str]]:
+        """Split a batched answer on '### Sentence N' headers.
+
+        Sentences without a section of their own get None; a single sentence gets the
+        whole answer when it has no header.
+        """
+        parts: Dict[int, str] = {}
+        matches = list(_SENTENCE_HEADER.finditer(response))
+        for m, nxt in zip(matches, matches[1:] + [None]):
+            idx = int(m.group(1))
+            parts[idx] = response[m.end():nxt.start() if nxt else len(response)].strip()
+        if not parts and n_sentences == 1:
+            return [response.strip()]
+        return [parts.get(i) for i in range(1, n_sentences + 1)]
+
+    def _generate(self, prompt: str) -> str:
+        """Call the model, retrying failures with exponential backoff and jitter."""
+        metrics = get_metrics()
+        attempt = 0
+        while True:
+            try:
+                with metrics.timer("llm_request_seconds", model=self.model):
+                    response = self.client.generate(model=self.model, prompt=prompt, options={"num_ctx": self.num_ctx})
+                metrics.count("llm_requests_total", model=self.model, result="ok")
+                return response["response"]
+            except Exception as e:
+                metrics.count("llm_requests_total", model=self.model, result="error")
+                status = getattr(e, "status_code", None)
+                if attempt >= self.max_retries or (status is not None and 400 <= status < 500 and status != 429):
+                    raise
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Request failed ({e}); retrying in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _run_batch(self, batch: List[str]) -> List[str]:
+        metrics = get_metrics()
+        metrics.count("llm_sentences_total", len(batch), model=self.model)
+        answers = self.split_response(self._generate(self.build_prompt(batch)), len(batch))
+        missing = [i for i, answer in enumerate(answers) if answer is None]
+        if missing:
+            # the answer could not be split for these sentences: ask for each one on its own
+            logger.warning(f"{len(missing)} of {len(batch)} sentence(s) missing from a batched answer; retrying singly")
+            metrics.count("llm_sentences_retried_total", len(missing), model=self.model)
+            for i in missing:
+                answers[i] = self.split_response(self._generate(self.build_prompt([batch[i]])), 1)[0] or ""
+        return answers
+
+    def iter_extract(self, sentences: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Yield {"sentence_index", "sentence", "response"} in input order, with bounded requests in flight."""
+        index = 0
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            in_flight: Deque[tuple] = deque()
+
+            def drain_one() -> Iterator[Dict[str, Any]]:
+                nonlocal index
+                batch, future = in_flight.popleft()
+                for sentence, answer in zip(batch, future.result()):
+                    yield {"sentence_index": index, "sentence": sentence, "response": answer}
+                    index += 1
+
+            for batch in self.pack_batches(sentences):
+                future: Future = executor.submit(self._run_batch, batch)
+                in_flight.append((batch, future))
+                if len(in_flight) >= self.max_in_flight:
+                    yield from drain_one()
+            while in_flight:
+                yield from drain_one()
+
+    def extract(self, sentences: Iterable[str]) -> List[Dict[str, Any]]:
+        return list(self.iter_extract(sentences))
+
+
+def main():
+    import ollama
+    from document_extraction.read_pdf_as_plain import iter_pages
+    from src.text_to_graph_knowledge.input import TextInput
+
+    parser = argparse.ArgumentParser(description="Extract Cypher from every sentence of an extracted book.")
+    parser.add_argument("pages", help="Extracted pages (.jsonl from stream_pdf_as_plain or .json)")
+    parser.add_argument("--output", "-o", required=True, help="Output JSONL, one record per sentence")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--host", default=None, help="Ollama host (default: OLLAMA_HOST or localhost)")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="Concurrent requests (default: 4)")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the model, ignoring cached responses")
+    parser.add_argument("--metrics-json", help="Write request timings and cache counters as a JSON summary to this file")
+    parser.add_argument("--metrics-prom", help="Write request timings and cache counters in Prometheus text format to this file")
+    args = parser.parse_args()
+
+    metrics = enable_metrics() if args.metrics_json or args.metrics_prom else get_metrics()
+
+    cache = ResponseCache(bypass=args.no_cache)
+    client = CachedOllamaClient(ollama.Client(host=args.host), cache, modelfiles={args.model: MODELFILE_PATH})
+    extractor = SentenceToCypherExtractor(client, args.model, args.max_in_flight)
+
+    def sentences() -> Iterator[str]:
+        for page in iter_pages(args.pages):
+            yield from TextInput.from_string(page.get("content") or "").split_sentences(0)
+
+    with open(args.output, "w", encoding="utf-8") as out:
+        for record in extractor.iter_extract(sentences()):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"Saved results to {args.output} (cache: {cache.hits} hit(s), {cache.misses} miss(es))")
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+
+
+if __name__ == "__main__":
+    main()
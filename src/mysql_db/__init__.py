@@ -1,5 +1,9 @@
 from .mysqlDatabase import MySQLDatabase
+from .sqliteDatabase import SQLiteDatabase
+from .knowledge_base import SQLKnowledgeBase
 
 __all__ = [
-    "MySQLDatabase"
+    "MySQLDatabase",
+    "SQLiteDatabase",
+    "SQLKnowledgeBase"
 ]
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+SQL-backed knowledge base for `EntityLinker`.
+
+KB entries (name -> metadata) live in a MySQL table accessed through the `MySQLDatabase`
+pool, or in SQLite through the `SQLiteDatabase` stand-in. Loading uses chunked upserts,
+the linker's candidate index is filled by streaming names through a server-side cursor,
+and metadata is fetched with batched `WHERE name IN (...)` queries behind a local LRU.
+
+Load a JSON KB:
+    python -m src.mysql_db.knowledge_base kb.json --host 127.0.0.1 --user user --database entity_linking
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+_MISSING = object()
+
+
+class SQLKnowledgeBase:
+    """
+    Read/write KB stored in two tables: entities (name, metadata JSON) and aliases (alias -> name).
+
+    :param db: `MySQLDatabase` or `SQLiteDatabase`
+    :param table: Entity table name
+    :param alias_table: Alias table name
+    :param cache_size: Number of metadata lookups (hits and misses) kept in the local LRU
+    :param create: Create the tables if they do not exist (only needed when loading, since it runs DDL)
+    """
+
+    def __init__(
+        self,
+        db,
+        table: str = "kb_entities",
+        alias_table: str = "kb_aliases",
+        cache_size: int = 100_000,
+        create: bool = False
+    ):
+        self.db = db
+        self.table = table
+        self.alias_table = alias_table
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        if create:
+            self.create_tables()
+
+    def create_tables(self) -> None:
+        self.db.insert(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                name VARCHAR(512) NOT NULL PRIMARY KEY,
+                metadata TEXT NOT NULL
+            )
+            """, ()
+        )
+        self.db.insert(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.alias_table} (
+                alias VARCHAR(512) NOT NULL PRIMARY KEY,
+                name VARCHAR(512) NOT NULL
+            )
+            """, ()
+        )
+
+    def load(self, entries: Union[Dict[str, Dict], Iterable[Tuple[str, Dict]]], chunk_size: int = 5000) -> int:
+        """
+        Bulk upsert entries (a dict or an iterable of (name, metadata) pairs).
+
+        Metadata "aliases" lists are also written to the alias table (lower-cased).
+        :return: Number of entries written
+        """
+        items = entries.items() if isinstance(entries, dict) else entries
+        aliases: List[Tuple[str, str]] = []
+        count = 0
+
+        def rows() -> Iterator[Tuple[str, str]]:
+            nonlocal count
+            for name, metadata in items:
+                count += 1
+                if isinstance(metadata, dict):
+                    aliases.extend((a.lower(), name) for a in metadata.get("aliases", ()) or ())
+                yield name, json.dumps(metadata, ensure_ascii=False)
+
+        self.db.upsert_many(self.table, ["name", "metadata"], rows(), key_columns=["name"], chunk_size=chunk_size)
+        if aliases:
+            self.db.upsert_many(self.alias_table, ["alias", "name"], aliases, key_columns=["alias"], chunk_size=chunk_size)
+        self._cache.clear()
+        return count
+
+    def iter_names(self, batch_size: int = 50_000) -> Iterator[str]:
+        """Stream every entity name without materialising the table."""
+        for row in self.db.stream(f"SELECT name FROM {self.table}", batch_size=batch_size):
+            yield row["name"]
+
+    def iter_aliases(self, batch_size: int = 50_000) -> Iterator[Tuple[str, str]]:
+        for row in self.db.stream(f"SELECT alias, name FROM {self.alias_table}", batch_size=batch_size):
+            yield row["alias"], row["name"]
+
+    def _remember(self, name: str, value: Any) -> None:
+        self._cache[name] = value
+        self._cache.move_to_end(name)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, Dict]:
+        """Metadata for the given names that exist; misses are fetched in batched IN queries."""
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        for name in dict.fromkeys(names):
+            cached = self._cache.get(name, _MISSING)
+            if cached is _MISSING:
+                missing.append(name)
+                continue
+            self._cache.move_to_end(name)
+            if cached is not None:
+                found[name] = cached
+        if missing:
+            rows = self.db.fetch_in(f"SELECT name, metadata FROM {self.table} WHERE name IN ({{placeholders}})", missing)
+            fetched = {row["name"]: json.loads(row["metadata"]) for row in rows}
+            for name in missing:
+                # cache misses too, so unknown names are not queried again
+                self._remember(name, fetched.get(name))
+            found.update(fetched)
+        return found
+
+    def get(self, name: str, default: Optional[Dict] = None) -> Optional[Dict]:
+        return self.get_many([name]).get(name, default)
+
+    def __getitem__(self, name: str) -> Dict:
+        result = self.get_many([name])
+        if name not in result:
+            raise KeyError(name)
+        return result[name]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name in self.get_many([name])
+
+    def __len__(self) -> int:
+        row = self.db.fetch_one(f"SELECT COUNT(*) AS n FROM {self.table}")
+        return int(row["n"]) if row else 0
+
+    def version(self) -> str:
+        """
+        Digest of the entity and alias tables that changes with every insert, update or delete.
+
+        MySQL computes it server-side with `CHECKSUM TABLE` (one scan of both tables); backends
+        without it (the SQLite stand-in) hash the rows as they are streamed.
+        """
+        try:
+            rows = self.db.fetch_all(f"CHECKSUM TABLE {self.table}, {self.alias_table}")
+            state: Any = [[row["Table"], row["Checksum"]] for row in rows]
+        except Exception:
+            digest = hashlib.sha256()
+            for row in self.db.stream(f"SELECT name, metadata FROM {self.table} ORDER BY name"):
+                digest.update(f"{row['name']}\0{row['metadata']}\n".encode("utf-8"))
+            for row in self.db.stream(f"SELECT alias, name FROM {self.alias_table} ORDER BY alias"):
+                digest.update(f"{row['alias']}\0{row['name']}\n".encode("utf-8"))
+            state = digest.hexdigest()
+        return hashlib.sha256(json.dumps(state, default=str).encode("utf-8")).hexdigest()
+
+
+def main():
+    from .mysqlDatabase import MySQLDatabase
+
+    parser = argparse.ArgumentParser(description="Bulk-load a JSON KB (name -> metadata) into MySQL.")
+    parser.add_argument("input", help="JSON file with a name -> metadata mapping")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default=os.getenv("MYSQL_PASSWORD", ""))
+    parser.add_argument("--database", default="entity_linking")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = MySQLDatabase(host=args.host, port=args.port, user=args.user, password=args.password, database=args.database)
+    with open(args.input, "r", encoding="utf-8") as fh:
+        kb = json.load(fh)
+    n = SQLKnowledgeBase(db, create=True).load(kb, chunk_size=args.chunk_size)
+    print(f"[INFO] Loaded {n} KB entries into {args.database}")
+
+
+if __name__ == "__main__":
+    main()
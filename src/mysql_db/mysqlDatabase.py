@@ -1,5 +1,17 @@
 from mysql.connector import pooling, Error
-from typing import Optional, Tuple, Any, List, Dict, Union
+from typing import Optional, Tuple, Any, List, Dict, Union, Iterable, Iterator, Sequence
+
+
+def chunked(rows: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Split an iterable into lists of at most `chunk_size` items."""
+    chunk: List[Any] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 
 class MySQLDatabase:
@@ -153,3 +165,122 @@ class MySQLDatabase:
         """
         result = self.execute_query(query, params, fetchall=True)
         return result if isinstance(result, list) else []
+
+    def execute_many(self, query: str, rows: Iterable[Tuple[Any, ...]], chunk_size: int = 1000) -> int:
+        """
+        Execute a parameterised statement for many rows over a single pooled connection.
+
+        Rows are sent with `executemany` in chunks (mysql-connector rewrites INSERTs into
+        multi-row statements) and each chunk is committed once.
+
+        :param query: SQL query string with %s placeholders
+        :param rows: Iterable of parameter tuples (may be a generator)
+        :param chunk_size: Rows per executemany call / commit
+        :return: Number of affected rows
+        """
+        conn, cursor = None, None
+        total = 0
+        try:
+            conn = self.pool.get_connection()
+            cursor = conn.cursor()
+            for chunk in chunked(rows, chunk_size):
+                cursor.executemany(query, chunk)
+                conn.commit()
+                total += cursor.rowcount
+            return total
+        except Error as e:
+            print(f"[ERROR] MySQL error: {e}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    def upsert_many(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Tuple[Any, ...]],
+        key_columns: Sequence[str],
+        chunk_size: int = 1000
+    ) -> int:
+        """
+        Insert rows, updating the non-key columns of rows whose key already exists.
+
+        :param table: Table name
+        :param columns: Column names, in the order of each row tuple
+        :param rows: Iterable of row tuples
+        :param key_columns: Columns forming the primary/unique key
+        :param chunk_size: Rows per executemany call / commit
+        :return: Number of affected rows
+        """
+        updates = ", ".join(f"{c} = VALUES({c})" for c in columns if c not in key_columns)
+        query = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+            + (f" ON DUPLICATE KEY UPDATE {updates}" if updates else "")
+        )
+        return self.execute_many(query, rows, chunk_size)
+
+    def stream(
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        batch_size: int = 10000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield rows of a large result set through an unbuffered (server-side) cursor.
+
+        Rows are fetched `batch_size` at a time, so the result never has to fit in memory.
+        The pooled connection is held until the generator is exhausted or closed. A stream
+        closed early drops the connection's session instead of reading the remaining rows;
+        the pool reconnects it on its next checkout.
+
+        :param query: SQL SELECT query string
+        :param params: Optional tuple of parameters
+        :param batch_size: Rows per fetchmany round trip
+        """
+        conn, cursor = None, None
+        exhausted = False
+        try:
+            conn = self.pool.get_connection()
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+            exhausted = True
+        except Error as e:
+            print(f"[ERROR] MySQL error: {e}")
+            raise
+        finally:
+            if conn and not exhausted:
+                # the server is still sending rows: drop the session rather than read them all
+                try:
+                    conn.disconnect()
+                except Error:
+                    pass
+            if cursor:
+                try:
+                    cursor.close()
+                except Error:
+                    pass
+            if conn:
+                conn.close()
+
+    def fetch_in(self, query: str, values: Sequence[Any], chunk_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Fetch rows matching many values with batched `IN (...)` queries.
+
+        :param query: SQL SELECT with an `IN ({placeholders})` clause, e.g.
+                      "SELECT * FROM kb WHERE name IN ({placeholders})"
+        :param values: Values to match
+        :param chunk_size: Values per query
+        :return: List of dictionaries representing rows
+        """
+        results: List[Dict[str, Any]] = []
+        for chunk in chunked(values, chunk_size):
+            results.extend(self.fetch_all(query.format(placeholders=", ".join(["%s"] * len(chunk))), tuple(chunk)))
+        return results
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+from typing import Optional, Tuple, Any, List, Dict, Union, Iterable, Iterator, Sequence
+
+from .mysqlDatabase import chunked
+
+
+class SQLiteDatabase:
+    """
+    SQLite stand-in with the same interface as `MySQLDatabase`.
+
+    Queries are written with MySQL-style %s placeholders and translated to SQLite's ?,
+    so code built on `MySQLDatabase` (e.g. `SQLKnowledgeBase`) can run against a local
+    file or an in-memory database without a MySQL server.
+
+    Example usage:
+    ----------------
+    db = SQLiteDatabase(":memory:")
+    db.insert("CREATE TABLE users (name TEXT PRIMARY KEY, email TEXT)", ())
+    db.upsert_many("users", ["name", "email"], [("Alice", "alice@example.com")], key_columns=["name"])
+    print(db.fetch_all("SELECT * FROM users"))
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        :param path: SQLite database file, or ":memory:"
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+    @staticmethod
+    def _sql(query: str) -> str:
+        return query.replace("%s", "?")
+
+    def execute_query(
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        fetchone: bool = False,
+        fetchall: bool = False,
+        commit: bool = False
+    ) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]], int]]:
+        with self._lock:
+            cursor = self._conn.execute(self._sql(query), params or ())
+            try:
+                if commit:
+                    self._conn.commit()
+                    return cursor.rowcount
+                if fetchone:
+                    row = cursor.fetchone()
+                    return dict(row) if row is not None else None
+                if fetchall:
+                    return [dict(r) for r in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    def insert(self, query: str, params: Tuple[Any, ...]) -> int:
+        return self.execute_query(query, params, commit=True)  # type: ignore
+
+    def fetch_one(self, query: str, params: Optional[Tuple[Any, ...]] = None) -> Optional[Dict[str, Any]]:
+        return self.execute_query(query, params, fetchone=True)  # type: ignore
+
+    def fetch_all(self, query: str, params: Optional[Tuple[Any, ...]] = None) -> List[Dict[str, Any]]:
+        result = self.execute_query(query, params, fetchall=True)
+        return result if isinstance(result, list) else []
+
+    def execute_many(self, query: str, rows: Iterable[Tuple[Any, ...]], chunk_size: int = 1000) -> int:
+        total = 0
+        with self._lock:
+            for chunk in chunked(rows, chunk_size):
+                cursor = self._conn.executemany(self._sql(query), chunk)
+                self._conn.commit()
+                total += cursor.rowcount
+        return total
+
+    def upsert_many(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Tuple[Any, ...]],
+        key_columns: Sequence[str],
+        chunk_size: int = 1000
+    ) -> int:
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in key_columns)
+        query = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON CONFLICT ({', '.join(key_columns)}) " + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+        )
+        return self.execute_many(query, rows, chunk_size)
+
+    def stream(
+        self,
+        query: str,
+        params: Optional[Tuple[Any, ...]] = None,
+        batch_size: int = 10000
+    ) -> Iterator[Dict[str, Any]]:
+        # a separate cursor steps through the result without materialising it
+        cursor = self._conn.execute(self._sql(query), params or ())
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+
+    def fetch_in(self, query: str, values: Sequence[Any], chunk_size: int = 500) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        for chunk in chunked(values, chunk_size):
+            results.extend(self.fetch_all(query.format(placeholders=", ".join(["%s"] * len(chunk))), tuple(chunk)))
+        return results
@@ -1,19 +1,30 @@
 """Package exports for text_to_graph_knowledge."""
-from .input import TextInput
-from .named_entity_recognition import NERModel
+from .input import TextInput, AnalysedDocument, Vocabulary
+from .named_entity_recognition import NERModel, EntityColumns
 from .coreference_resolution import CoreferenceResolver
 from .entity_linking import EntityLinker
+from .kb_store import MmapKB
 from .co_ocurrence_graphs import CooccurrenceGraphBuilder
+from .graph_export import GraphAccumulator, CypherExporter
+from .record_stream import RecordStreamReader, RecordStreamWriter
 from .relationship_extraction import RelationshipExtractor
 from .rule_based_relation_extraction import RuleBasedRelationExtractor
 
 
 __all__ = [
 "TextInput",
+"AnalysedDocument",
+"Vocabulary",
 "NERModel",
+"EntityColumns",
 "CoreferenceResolver",
 "EntityLinker",
+"MmapKB",
 "CooccurrenceGraphBuilder",
+"GraphAccumulator",
+"CypherExporter",
+"RecordStreamReader",
+"RecordStreamWriter",
 "RelationshipExtractor",
 "RuleBasedRelationExtractor",
 ]
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""Per-document, per-stage store of pipeline outputs for incremental re-runs.
+
+Every stage output is saved under the SHA-256 of the document text and the
+stage name, together with the fingerprint of the configuration that produced
+it (NER rules, KB version, window size, relation rules, ...). A stage's
+fingerprint also covers the fingerprints of the stages it consumes, so
+changing the NER rules invalidates relation extraction too, while editing a
+relation rule leaves NER, coreference, linking and co-occurrence outputs
+valid. Only the latest output per (document, stage) is kept.
+
+The store is a single SQLite file in WAL mode; each worker process opens its
+own connection and writes are buffered into one transaction per `flush`.
+"""
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import hashlib
+import json
+import sqlite3
+
+_HASH_CHUNK = 1 << 20
+
+
+def text_digest(text: str) -> str:
+    """Key of a document: the SHA-256 of its text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable digest of JSON-serialisable configuration values."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """SHA-256 of a file's contents, streamed without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """SQLite-backed stage outputs keyed by (document digest, stage).
+
+    Parameters
+    ----------
+    path : str
+        SQLite file (created if missing).
+    flush_every : int
+        Documents whose outputs are buffered before they are written.
+    """
+
+    def __init__(self, path: str, flush_every: int = 200) -> None:
+        self.path = Path(path)
+        self.flush_every = max(1, int(flush_every))
+        self.reused: Counter = Counter()
+        self.computed: Counter = Counter()
+        self._buffer: List[Tuple[str, str, str, str]] = []
+        self._buffered_docs = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artifacts (
+                doc TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (doc, stage)
+            ) WITHOUT ROWID
+            """
+        )
+
+    def load(self, doc: str, fingerprints: Dict[str, str]) -> Dict[str, Any]:
+        """Stored outputs of `doc` whose fingerprint matches `fingerprints[stage]`."""
+        valid = {}
+        for stage, fp, value in self._conn.execute(
+            "SELECT stage, fingerprint, value FROM artifacts WHERE doc = ?", (doc,)
+        ):
+            if fingerprints.get(stage) == fp:
+                valid[stage] = json.loads(value)
+        return valid
+
+    def save(self, doc: str, outputs: Dict[str, Any], fingerprints: Dict[str, str]) -> None:
+        """Queue freshly computed stage outputs of `doc` (replacing older ones)."""
+        for stage, value in outputs.items():
+            self._buffer.append((doc, stage, fingerprints[stage], json.dumps(value, ensure_ascii=False)))
+        self._buffered_docs += 1
+        if self._buffered_docs >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (doc, stage, fingerprint, value) VALUES (?, ?, ?, ?)",
+                self._buffer,
+            )
+        self._buffer.clear()
+        self._buffered_docs = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> "ArtifactStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,14 +1,90 @@
 """Build co-occurrence graphs from token or entity sequences.
 
 The implementation uses networkx if available, otherwise falls back to a
-simple adjacency dict structure.
+simple adjacency dict structure. The "sparse" backend counts pairs into a
+vocabulary-indexed SciPy matrix (see `sparse_cooccurrence`) and is the one to
+use for corpus-level graphs.
+
+`top_edges` selects with a bounded heap (O(E log k)) instead of sorting every
+edge; with `track_top=k` the k heaviest edges are maintained while counting, so
+repeated queries on a growing graph cost O(k). Association weights (PMI, NPMI)
+are only computed for the edges that are returned.
 """
-from typing import Iterable, List, Tuple, Dict
+from heapq import nlargest
+from operator import itemgetter
+from typing import Hashable, Iterable, Iterator, List, Tuple, Dict, Optional, Union
+import math
+
+from .input import AnalysedDocument, Vocabulary
 try:
     import networkx as nx  # optional
 except Exception:
     nx = None
 
+BACKENDS = ("networkx", "dict", "sparse")
+WEIGHTINGS = ("count", "pmi", "npmi")
+
+
+def association(weight: float, strength_u: float, strength_v: float, total: float, weighting: str = "count") -> float:
+    """Re-weight an edge count by `weighting`.
+
+    With N = `total` pair count and s(x) = summed weight of x's edges,
+    p(u, v) = weight / N and p(x) = s(x) / 2N (every pair counts for both of its
+    tokens). "pmi" is log(p(u, v) / (p(u) p(v))); "npmi" divides it by
+    -log p(u, v), giving a value in [-1, 1].
+    """
+    if weighting == "count":
+        return weight
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"Unknown weighting '{weighting}'. Choose one of {WEIGHTINGS}.")
+    pmi = math.log(4.0 * total * weight / (strength_u * strength_v))
+    if weighting == "pmi":
+        return pmi
+    p = weight / total
+    return 1.0 if p >= 1.0 else pmi / -math.log(p)
+
+
+def window_pair_count(n: int, window_size: int) -> int:
+    """Number of pairs a sequence of `n` tokens contributes with the given window."""
+    if n <= window_size:
+        return n * (n - 1) // 2
+    return window_size * n - window_size * (window_size + 1) // 2
+
+
+class TopKEdges:
+    """The k heaviest edges of a graph whose edge weights only ever grow.
+
+    Feed every new weight of an edge through `update`; edges that do not exceed
+    `threshold` (the k-th weight once k edges are held) can be skipped by the
+    caller without a call. An edge outside the set can only enter by growing
+    past the threshold, so the held set is always an exact top-k.
+    """
+
+    def __init__(self, k: int) -> None:
+        self.k = max(1, int(k))
+        self.weights: Dict[Hashable, float] = {}
+        self.threshold: float = 0
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def update(self, edge: Hashable, weight: float) -> None:
+        weights = self.weights
+        if edge not in weights and len(weights) >= self.k:
+            if weight <= self.threshold:
+                return
+            del weights[min(weights, key=weights.get)]
+        weights[edge] = weight
+        if len(weights) >= self.k:
+            self.threshold = min(weights.values())
+
+    def top(self, k: Optional[int] = None, min_weight: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        """Held edges as (edge, weight), heaviest first."""
+        items = sorted(self.weights.items(), key=itemgetter(1), reverse=True)[:k]
+        if min_weight is not None:
+            items = [item for item in items if item[1] >= min_weight]
+        return items
+
 
 class CooccurrenceGraphBuilder:
     """Create co-occurrence graphs using a sliding window.
@@ -19,30 +95,88 @@ class CooccurrenceGraphBuilder:
         Number of tokens to consider for co-occurrence.
     use_networkx : bool
         Prefer networkx if available.
+    backend : str, optional
+        "networkx", "dict" or "sparse"; overrides `use_networkx` when given.
+    accumulate : bool
+        Add every `build_from_tokens` call to the same graph instead of
+        starting a new one (corpus-level counts).
+    track_top : int
+        Maintain the `track_top` heaviest edges while counting (0 disables),
+        so `top_edges(k)` with k <= `track_top` does not scan the graph.
+    vocab : Vocabulary, optional
+        Token vocabulary of the sparse backend; pass the one shared with the
+        `AnalysedDocument`s to count them from their token ids.
     """
 
-    def __init__(self, window_size: int = 2, use_networkx: bool = True) -> None:
+    def __init__(
+        self,
+        window_size: int = 2,
+        use_networkx: bool = True,
+        backend: Optional[str] = None,
+        accumulate: bool = False,
+        track_top: int = 0,
+        vocab: Optional[Vocabulary] = None,
+    ) -> None:
         self.window_size = max(1, int(window_size))
-        self._use_nx = use_networkx and (nx is not None)
+        if backend is None:
+            backend = "networkx" if use_networkx and nx is not None else "dict"
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown co-occurrence backend '{backend}'. Choose one of {BACKENDS}.")
+        if backend == "networkx" and nx is None:
+            raise ImportError("networkx is not installed; use backend='dict' or 'sparse'.")
+        self.backend = backend
+        self._use_nx = backend == "networkx"
+        self.accumulate = accumulate
+        self.track_top = max(0, int(track_top))
+        self.vocab = vocab
         self._graph = None
+        self._top: Optional[TopKEdges] = None
+        self._n_pairs = 0
+
+    def _new_graph(self):
+        self._n_pairs = 0
+        if self.backend == "sparse":
+            # numpy/scipy are only needed by this backend
+            from .sparse_cooccurrence import SparseCooccurrence
+            return SparseCooccurrence(window_size=self.window_size, track_top=self.track_top, vocab=self.vocab)
+        self._top = TopKEdges(self.track_top) if self.track_top else None
+        return nx.Graph() if self._use_nx else {}
 
-    def build_from_tokens(self, token_sequences: Iterable[List[str]]):
+    def build_from_tokens(self, token_sequences: Union[AnalysedDocument, Iterable[List[str]]]):
+        """Count window pairs of lower-cased token sequences or of an `AnalysedDocument`'s sentences."""
+        graph = self._graph if self.accumulate and self._graph is not None else self._new_graph()
+        top = self._top
+        if self.backend == "sparse":
+            if isinstance(token_sequences, AnalysedDocument):
+                graph.add_document(token_sequences)
+            else:
+                graph.add_sequences(token_sequences)
+            self._graph = graph
+            return graph
+        if isinstance(token_sequences, AnalysedDocument):
+            token_sequences = token_sequences.token_sequences()
         if self._use_nx:
-            G = nx.Graph()
+            G = graph
             for tokens in token_sequences:
                 n = len(tokens)
+                self._n_pairs += window_pair_count(n, self.window_size)
                 for i in range(n):
                     for j in range(i + 1, min(i + 1 + self.window_size, n)):
                         a, b = tokens[i], tokens[j]
                         if G.has_edge(a, b):
-                            G[a][b]["weight"] += 1
+                            data = G[a][b]
+                            data["weight"] += 1
+                            w = data["weight"]
                         else:
                             G.add_edge(a, b, weight=1)
-            self._graph = G
+                            w = 1
+                        if top is not None and w > top.threshold:
+                            top.update((a, b) if a <= b else (b, a), w)
         else:
-            adj: Dict[str, Dict[str, int]] = {}
+            adj: Dict[str, Dict[str, int]] = graph
             for tokens in token_sequences:
                 n = len(tokens)
+                self._n_pairs += window_pair_count(n, self.window_size)
                 for i in range(n):
                     for j in range(i + 1, min(i + 1 + self.window_size, n)):
                         a, b = tokens[i], tokens[j]
@@ -50,27 +184,86 @@ class CooccurrenceGraphBuilder:
                         adj.setdefault(b, {}).setdefault(a, 0)
                         adj[a][b] += 1
                         adj[b][a] += 1
-            self._graph = adj
+                        if top is not None and adj[a][b] > top.threshold:
+                            top.update((a, b) if a <= b else (b, a), adj[a][b])
+        self._graph = graph
         return self._graph
 
+    def merge(self, other: "CooccurrenceGraphBuilder") -> None:
+        """Fold another builder's sparse graph (e.g. a worker's partial counts) into this one."""
+        if self.backend != "sparse" or other.backend != "sparse":
+            raise ValueError("Only sparse co-occurrence graphs can be merged.")
+        if other._graph is None:
+            return
+        if self._graph is None:
+            self._graph = self._new_graph()
+        self._graph.merge(other._graph)
+
     def get_graph(self):
         return self._graph
 
-    def top_edges(self, k: int = 10):
-        """Return top-k edges by weight as list of ((u, v), weight)."""
-        if self._graph is None:
-            return []
+    def to_networkx(self):
+        """Return the graph as networkx, converting the sparse backend's matrix on demand."""
+        if self.backend == "sparse":
+            return self._graph.to_networkx() if self._graph is not None else nx.Graph()
+        if self._use_nx:
+            return self._graph
+        G = nx.Graph()
+        for u, nbrs in (self._graph or {}).items():
+            for v, w in nbrs.items():
+                G.add_edge(u, v, weight=w)
+        return G
+
+    def _iter_edges(self, min_weight: Optional[float] = None) -> Iterator[Tuple[Tuple[str, str], int]]:
         if self._use_nx:
-            edges = sorted(self._graph.edges(data=True), key=lambda e: e[2].get("weight", 1), reverse=True)
-            return [((u, v), d.get("weight", 1)) for u, v, d in edges[:k]]
+            edges = (((u, v), d.get("weight", 1)) for u, v, d in self._graph.edges(data=True))
+        else:
+            # each undirected edge is reported once, from the endpoint inserted first
+            adj = self._graph
+            rank = {u: i for i, u in enumerate(adj)}
+            edges = (((u, v), w) for u, nbrs in adj.items() for v, w in nbrs.items() if rank[u] <= rank[v])
+        if min_weight is not None:
+            edges = (e for e in edges if e[1] >= min_weight)
+        return edges
+
+    def strength(self, token: str) -> float:
+        """Summed weight of the edges of `token`."""
+        if self.backend == "sparse":
+            return self._graph.strength(token)
+        if self._use_nx:
+            return self._graph.degree(token, weight="weight") if token in self._graph else 0
+        return sum(self._graph.get(token, {}).values())
+
+    @property
+    def total(self) -> int:
+        """Number of window pairs counted into the current graph."""
+        if self.backend == "sparse":
+            return self._graph.total if self._graph is not None else 0
+        return self._n_pairs
+
+    def association(self, u: str, v: str, weight: float, weighting: str = "count") -> float:
+        """Weight of edge (u, v) with count `weight` under `weighting` (see `association`)."""
+        if weighting == "count":
+            return weight
+        return association(weight, self.strength(u), self.strength(v), self.total, weighting)
+
+    def top_edges(self, k: int = 10, min_weight: Optional[float] = None, weighting: str = "count"):
+        """Return top-k edges by weight as list of ((u, v), weight).
+
+        Edges are ranked by co-occurrence count and those below `min_weight` are
+        dropped. With `weighting="pmi"` or `"npmi"` the returned weights are the
+        association scores of the selected edges.
+        """
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"Unknown weighting '{weighting}'. Choose one of {WEIGHTINGS}.")
+        if self._graph is None or k <= 0:
+            return []
+        if self.backend == "sparse":
+            edges = self._graph.top_edges(k, min_weight)
+        elif self._top is not None and k <= self._top.k:
+            edges = self._top.top(k, min_weight)
         else:
-            pairs: List[Tuple[Tuple[str, str], int]] = []
-            seen = set()
-            for u, nbrs in self._graph.items():
-                for v, w in nbrs.items():
-                    if (v, u) in seen:
-                        continue
-                    seen.add((u, v))
-                    pairs.append(((u, v), w))
-            pairs.sort(key=lambda x: x[1], reverse=True)
-            return pairs[:k]
+            edges = nlargest(k, self._iter_edges(min_weight), key=itemgetter(1))
+        if weighting != "count":
+            edges = [((u, v), self.association(u, v, w, weighting)) for (u, v), w in edges]
+        return edges
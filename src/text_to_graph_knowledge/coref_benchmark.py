@@ -0,0 +1,95 @@
+"""Compare coreference backends by throughput and memory on the same text.
+
+Each backend runs in its own freshly spawned process so that model loading and
+peak RSS of one backend do not leak into the numbers of another.
+
+Example:
+    python -m text_to_graph_knowledge.coref_benchmark book.txt --backends heuristic neural \\
+        --model-path models/f-coref
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, Iterable, List, Optional
+import argparse
+import json
+import resource
+import sys
+import time
+
+from .coreference_resolution import available_backends, get_resolver
+from .input import TextInput
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB (Linux)."""
+    with open("/proc/self/statm") as fh:
+        pages = int(fh.read().split()[1])
+    return pages * resource.getpagesize() / 2 ** 20
+
+
+def benchmark_backend(name: str, sentences: List[str], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Resolve `sentences` once with backend `name` in this process and report timings and memory."""
+    t0 = time.perf_counter()
+    resolver = get_resolver(name, **(options or {}))
+    resolver.resolve(sentences[:1])  # loads lazily-initialised models
+    t1 = time.perf_counter()
+    clusters = resolver.resolve(sentences)
+    t2 = time.perf_counter()
+    return {
+        "backend": name,
+        "sentences": len(sentences),
+        "clusters": len(clusters),
+        "load_s": round(t1 - t0, 3),
+        "resolve_s": round(t2 - t1, 3),
+        "sentences_per_s": round(len(sentences) / (t2 - t1), 1) if t2 > t1 else None,
+        "rss_mb": round(_rss_mb(), 1),
+        # ru_maxrss is reported in KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def compare_backends(
+    sentences: List[str],
+    backends: Iterable[str],
+    options: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """Run `benchmark_backend` for each backend in an isolated process."""
+    reports = []
+    for name in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            reports.append(pool.submit(benchmark_backend, name, sentences, (options or {}).get(name)).result())
+    return reports
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark coreference backends (throughput and RSS).")
+    parser.add_argument("inputs", nargs="+", help="Plain-text files; their sentences are concatenated")
+    parser.add_argument("--backends", nargs="+", default=["heuristic"], choices=available_backends())
+    parser.add_argument("--model-path", help="Local model directory for the neural backend")
+    parser.add_argument("--window", type=int, default=20, help="Sentences per window (neural)")
+    parser.add_argument("--overlap", type=int, default=4, help="Sentences shared by adjacent windows (neural)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Windows per forward pass (neural)")
+    parser.add_argument("--threads", type=int, help="Torch CPU threads (neural)")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args(argv)
+
+    sentences: List[str] = []
+    for path in args.inputs:
+        sentences.extend(TextInput.from_file(path).split_sentences(0))
+
+    neural = {"window": args.window, "overlap": args.overlap, "batch_size": args.batch_size, "num_threads": args.threads}
+    if args.model_path:
+        neural["model_path"] = args.model_path
+    reports = compare_backends(sentences, args.backends, {"neural": neural})
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'backend':<12}{'sent/s':>12}{'resolve s':>12}{'load s':>10}{'RSS MB':>10}{'peak MB':>10}{'clusters':>10}")
+    for r in reports:
+        print(f"{r['backend']:<12}{r['sentences_per_s']!s:>12}{r['resolve_s']:>12}{r['load_s']:>10}"
+              f"{r['rss_mb']:>10}{r['peak_rss_mb']:>10}{r['clusters']:>10}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
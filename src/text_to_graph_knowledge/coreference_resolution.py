@@ -3,10 +3,26 @@
 This is *not* a state-of-the-art resolver. It offers a class interface that can be
 replaced with stronger backends (neural models) while keeping the rest of the
 pipeline unchanged.
+
+Clustering is a single ordered pass over the mentions with a surface -> cluster id
+dictionary, so it is linear in the number of mentions. `CoreferenceStream` applies
+the same heuristic to sentences fed one at a time and only remembers antecedents
+seen in a bounded window of recent sentences.
+
+Resolvers are looked up by name through a small backend registry
+(`get_resolver("heuristic")`, `get_resolver("neural", model_path=...)`);
+backends with heavy dependencies are imported only when first requested.
 """
-from typing import List, Dict, Tuple
+from collections import OrderedDict
+from typing import Any, Callable, List, Dict, Tuple, Iterable, Iterator, Optional, Union
 import re
 
+from .input import AnalysedDocument
+
+Mention = Tuple[int, int, str]  # (sent_idx, token_idx, mention_text)
+
+_TOKEN = re.compile(r"\w+")
+
 
 class CoreferenceResolver:
     """A minimal coreference resolver.
@@ -21,56 +37,177 @@ class CoreferenceResolver:
     def __init__(self) -> None:
         pass
 
-    def find_mentions(self, sentences: List[str]) -> List[Tuple[int, int, str]]:
+    def is_pronoun(self, text: str) -> bool:
+        return text.lower() in self.PRONOUNS
+
+    def sentence_mentions(self, sent_idx: int, sentence: str) -> List[Mention]:
+        """Mentions of a single sentence, in token order."""
+        pronouns = self.PRONOUNS
+        return [
+            (sent_idx, ti, t)
+            for ti, t in enumerate(_TOKEN.findall(sentence))
+            if t[0].isupper() or t.lower() in pronouns
+        ]
+
+    def document_mentions(self, doc: AnalysedDocument) -> List[Mention]:
+        """Mentions of an analysed document, read from its token columns.
+
+        Only the surfaces of tokens that are mentions are sliced out of the text.
+        """
+        index = doc.vocab.index
+        pronoun_ids = {index[p] for p in self.PRONOUNS if p in index}
+        text, rows = doc.text, doc.sentence_tokens
+        starts, ends, ids = doc.token_starts, doc.token_ends, doc.token_ids
+        mentions = []
+        for si in range(len(doc)):
+            a, b = rows[si], rows[si + 1]
+            for ti, (s, e, i) in enumerate(zip(starts[a:b], ends[a:b], ids[a:b])):
+                if text[s].isupper() or i in pronoun_ids:
+                    mentions.append((si, ti, text[s:e]))
+        return mentions
+
+    def find_mentions(self, sentences: Union[AnalysedDocument, List[str]]) -> List[Mention]:
         """Return mentions as (sent_idx, token_idx, mention_text).
 
         This naive implementation considers any capitalized word or pronoun a mention.
         """
+        if isinstance(sentences, AnalysedDocument):
+            return self.document_mentions(sentences)
         mentions = []
         for si, s in enumerate(sentences):
-            tokens = re.findall(r"\w+", s)
-            for ti, t in enumerate(tokens):
-                if t.lower() in self.PRONOUNS or t[0].isupper():
-                    mentions.append((si, ti, t))
+            mentions.extend(self.sentence_mentions(si, s))
         return mentions
 
-    def resolve(self, sentences: List[str]) -> Dict[int, List[Tuple[int, int, str]]]:
-        """Resolve mentions into clusters.
+    def resolve(self, sentences: Union[AnalysedDocument, List[str]]) -> Dict[int, List[Mention]]:
+        """Resolve mentions into clusters of a list of sentences or an `AnalysedDocument`.
 
-        Returns a mapping cluster_id -> list of mentions.
+        Returns a mapping cluster_id -> list of mentions: the cluster's non-pronoun
+        mentions first, then the pronouns linked to it, each in document order.
         """
         mentions = self.find_mentions(sentences)
-        clusters: Dict[int, List[Tuple[int, int, str]]] = {}
-        cluster_id = 0
+        surface_cluster: Dict[str, int] = {}
+        clusters: Dict[int, List[Mention]] = {}
+        linked_pronouns: Dict[int, List[Mention]] = {}
 
-        # simple exact-match clustering for non-pronouns
+        # exact-match clustering for non-pronouns: one dictionary lookup per mention
         for m in mentions:
-            si, ti, text = m
-            if text.lower() not in self.PRONOUNS:
-                # try to find existing cluster with same surface
-                found = False
-                for cid, members in clusters.items():
-                    if any(m2[2] == text for m2 in members):
-                        clusters[cid].append(m)
-                        found = True
-                        break
-                if not found:
-                    clusters[cluster_id] = [m]
-                    cluster_id += 1
+            if not self.is_pronoun(m[2]):
+                cid = surface_cluster.setdefault(m[2], len(surface_cluster))
+                clusters.setdefault(cid, []).append(m)
 
         # naive pronoun linking: assign pronouns to the most recent non-pronoun cluster
         last_non_pronoun_cluster = None
-        # order mentions by position
-        sorted_mentions = sorted(mentions, key=lambda x: (x[0], x[1]))
-        for m in sorted_mentions:
-            si, ti, text = m
-            if text.lower() in self.PRONOUNS:
+        for m in sorted(mentions, key=lambda x: (x[0], x[1])):
+            if self.is_pronoun(m[2]):
                 if last_non_pronoun_cluster is not None:
-                    clusters[last_non_pronoun_cluster].append(m)
+                    linked_pronouns.setdefault(last_non_pronoun_cluster, []).append(m)
             else:
-                # find its cluster id
-                for cid, members in clusters.items():
-                    if any(m2[0] == si and m2[1] == ti and m2[2] == text for m2 in members):
-                        last_non_pronoun_cluster = cid
-                        break
+                last_non_pronoun_cluster = surface_cluster[m[2]]
+
+        for cid, pronouns in linked_pronouns.items():
+            clusters[cid].extend(pronouns)
         return clusters
+
+    def iter_resolve(self, sentences: Iterable[str], window: Optional[int] = 50) -> Iterator[List[Tuple[int, Mention]]]:
+        """Stream sentences through a `CoreferenceStream`, yielding each sentence's (cluster_id, mention) pairs."""
+        stream = CoreferenceStream(self, window=window)
+        for sentence in sentences:
+            yield stream.add_sentence(sentence)
+
+
+class CoreferenceStream:
+    """Incremental form of `CoreferenceResolver.resolve` with bounded memory.
+
+    Sentences are added one at a time and each call returns the (cluster_id,
+    mention) assignments of that sentence. Only surfaces mentioned within the last
+    `window` sentences are remembered; a surface that reappears after falling out
+    of the window starts a new cluster. With `window=None` the assignments are the
+    same as those of `resolve`.
+
+    Parameters
+    ----------
+    resolver : CoreferenceResolver, optional
+        Supplies mention detection and the pronoun list.
+    window : int, optional
+        Number of recent sentences whose antecedents are kept.
+    """
+
+    def __init__(self, resolver: Optional[CoreferenceResolver] = None, window: Optional[int] = 50):
+        self.resolver = resolver or CoreferenceResolver()
+        self.window = window
+        self.sent_idx = 0
+        self.next_cluster = 0
+        self.last_non_pronoun_cluster: Optional[int] = None
+        self._last_sentence: Optional[int] = None
+        # surface -> (cluster id, last sentence seen), least recently seen first
+        self._surfaces: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of remembered antecedent surfaces."""
+        return len(self._surfaces)
+
+    def add_sentence(self, sentence: str) -> List[Tuple[int, Mention]]:
+        si = self.sent_idx
+        self.sent_idx += 1
+        if self.window is not None:
+            horizon = si - self.window
+            while self._surfaces and next(iter(self._surfaces.values()))[1] < horizon:
+                self._surfaces.popitem(last=False)
+            if self._last_sentence is not None and self._last_sentence < horizon:
+                self.last_non_pronoun_cluster = None
+
+        assigned: List[Tuple[int, Mention]] = []
+        for m in self.resolver.sentence_mentions(si, sentence):
+            if self.resolver.is_pronoun(m[2]):
+                if self.last_non_pronoun_cluster is not None:
+                    assigned.append((self.last_non_pronoun_cluster, m))
+                continue
+            entry = self._surfaces.pop(m[2], None)
+            if entry is None:
+                cid = self.next_cluster
+                self.next_cluster += 1
+            else:
+                cid = entry[0]
+            self._surfaces[m[2]] = (cid, si)
+            self.last_non_pronoun_cluster = cid
+            self._last_sentence = si
+            assigned.append((cid, m))
+        return assigned
+
+
+_BACKENDS: Dict[str, Callable[..., Any]] = {}
+
+
+def register_backend(name: str, factory: Optional[Callable[..., Any]] = None):
+    """Register a resolver factory under `name`; usable as a decorator.
+
+    The factory is called with the keyword arguments given to `get_resolver` and
+    must return an object with a `resolve(sentences)` method.
+    """
+    if factory is None:
+        return lambda f: register_backend(name, f)
+    _BACKENDS[name] = factory
+    return factory
+
+
+def available_backends() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+def get_resolver(name: str = "heuristic", **kwargs) -> CoreferenceResolver:
+    """Instantiate the coreference backend registered as `name`."""
+    try:
+        factory = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown coreference backend '{name}'. Available: {', '.join(available_backends())}")
+    return factory(**kwargs)
+
+
+register_backend("heuristic", CoreferenceResolver)
+
+
+@register_backend("neural")
+def _neural_backend(**kwargs) -> CoreferenceResolver:
+    # torch / fastcoref are only imported when the neural backend is requested
+    from .neural_coreference import NeuralCoreferenceResolver
+    return NeuralCoreferenceResolver(**kwargs)
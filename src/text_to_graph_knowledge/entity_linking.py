@@ -1,10 +1,24 @@
 """Entity linking class that maps detected entity mentions to entries in a KB.
 
 This module includes a simple in-memory KB and fuzzy string matching linking.
+Candidates are generated from a character-trigram index that is maintained
+incrementally by `add_entry`, so only a few hundred KB names are scored with
+`difflib` per mention instead of the whole KB. Shared trigrams are counted with
+NumPy directly over the posting arrays (in memory or memory-mapped). Large KBs can be served from a
+memory-mapped `MmapKB` store instead of an in-memory dict, or from a SQL
+database: only names and aliases are indexed locally, metadata stays remote.
 """
-from typing import Dict, Iterable, Tuple, Optional
+from array import array
+from typing import Dict, Iterable, List, Tuple, Optional, Sequence
 import difflib
 
+import numpy as np
+
+from .kb_store import MmapKB, trigrams as _trigrams
+
+# lower bound of the default `max_postings`
+_MIN_POSTINGS = 1000
+
 
 class EntityLinker:
     """Link entity mentions to knowledge-base entries.
@@ -12,29 +26,202 @@ class EntityLinker:
     The in-memory KB is a mapping of canonical name -> metadata dictionary. The
     `link` method returns the KB key and a score (0..1) or None when no good
     candidate exists.
+
+    Exact names and aliases (a metadata "aliases" list) are resolved through
+    dictionary lookups. Other mentions are matched against candidates that share
+    the most character trigrams with them, and only those candidates are scored.
+
+    Parameters
+    ----------
+    kb : dict, optional
+        Initial KB; it is indexed on construction.
+    store : MmapKB, optional
+        Read-only memory-mapped KB searched alongside `kb`; entries added with
+        `add_entry` live in `kb` on top of it.
+    database : SQLKnowledgeBase, optional
+        SQL-backed KB whose names are indexed locally and whose metadata is
+        fetched on demand (see `from_database`).
+    max_candidates : int
+        Number of trigram candidates scored with `SequenceMatcher` per mention.
+    max_postings : int, optional
+        Trigrams shared by more KB names than this are too common to discriminate:
+        they never add candidates, only re-rank the ones found through rarer trigrams.
+        Defaults to 0.1% of the indexed names (at least 1000), so the work per
+        mention stays bounded as the KB grows.
     """
 
-    def __init__(self, kb: Optional[Dict[str, Dict]] = None):
+    def __init__(
+        self,
+        kb: Optional[Dict[str, Dict]] = None,
+        max_candidates: int = 200,
+        max_postings: Optional[int] = None,
+        store: Optional[MmapKB] = None,
+        database=None,
+    ):
         self.kb = kb or {}
+        self.store = store
+        self.database = database
+        self.max_candidates = max_candidates
+        self.max_postings = max_postings
+        self._names: List[str] = []
+        self._lengths = array("I")
+        self._postings: Dict[str, array] = {}
+        self._aliases: Dict[str, str] = {}
+        self._indexed = set()
+        self._kb_size = 0
+        self._index_missing()
+        if database is not None:
+            for name in database.iter_names():
+                self._index(name, None)
+            for alias, name in database.iter_aliases():
+                self._aliases.setdefault(alias, name)
+
+    @classmethod
+    def from_store(cls, path: str, **kwargs) -> "EntityLinker":
+        """Create a linker backed by a KB store file built with `kb_store.build_kb_store`."""
+        return cls(store=MmapKB(path), **kwargs)
+
+    @classmethod
+    def from_database(cls, database, **kwargs) -> "EntityLinker":
+        """Create a linker over a `mysql_db.SQLKnowledgeBase`; names and aliases are streamed in once."""
+        return cls(database=database, **kwargs)
 
     def add_entry(self, name: str, metadata: Dict) -> None:
         self.kb[name] = metadata
+        self._index(name, metadata)
+
+    def _index(self, name: str, metadata: Optional[Dict]) -> None:
+        if isinstance(metadata, dict):
+            for alias in metadata.get("aliases", ()) or ():
+                self._aliases.setdefault(alias.lower(), name)
+        if name in self._indexed:
+            return
+        self._indexed.add(name)
+        idx = len(self._names)
+        self._names.append(name)
+        self._lengths.append(len(name))
+        for gram in _trigrams(name):
+            self._postings.setdefault(gram, array("I")).append(idx)
+
+    def _index_missing(self) -> None:
+        # picks up entries written straight into `self.kb`
+        for name, metadata in self.kb.items():
+            if name not in self._indexed:
+                self._index(name, metadata)
+        self._kb_size = len(self.kb)
+
+    def _count(self, postings_lists: Iterable, lengths: Sequence[int], lo: float, hi: float) -> List[Tuple[int, int]]:
+        """(name index, shared trigrams) of the `max_candidates` names sharing the most trigrams.
+
+        Posting lists are read rarest first. Once the names seen so far are bound to
+        outrank every name first seen in the remaining lists (or the next list is longer
+        than `max_postings`), the remaining lists are only probed for those names with a
+        binary search. Ties are ranked by first appearance.
+        """
+        lists = sorted((p for p in postings_lists if p), key=len)
+        if not lists:
+            return []
+        k = self.max_candidates
+        max_postings = self.max_postings or max(_MIN_POSTINGS, len(lengths) // 1000)
+        name_lengths = np.frombuffer(lengths, dtype=np.uint32)
+        parts = []
+        n_seen = 0
+        names = None
+        m = 0
+        while m < len(lists):
+            postings = np.frombuffer(lists[m], dtype=np.uint32)
+            if len(postings) > max_postings and n_seen:
+                break
+            postings = postings[(name_lengths[postings] >= lo) & (name_lengths[postings] <= hi)]
+            parts.append(postings)
+            n_seen += len(postings)
+            m += 1
+            remaining = len(lists) - m
+            # counts so far are at most m, so the bound cannot hold earlier
+            if remaining and m >= remaining:
+                names, first, counts = np.unique(np.concatenate(parts), return_index=True, return_counts=True)
+                if len(counts) >= k and np.partition(counts, len(counts) - k)[len(counts) - k] >= remaining:
+                    break
+                names = None
+        if names is None:
+            names, first, counts = np.unique(np.concatenate(parts), return_index=True, return_counts=True)
+        rest = lists[m:]
+        if rest and len(names):
+            if len(counts) > k:
+                # names that cannot reach the current k-th count even with every remaining trigram
+                keep = counts + len(rest) >= np.partition(counts, len(counts) - k)[len(counts) - k]
+                names, first, counts = names[keep], first[keep], counts[keep]
+            for postings in rest:
+                postings = np.frombuffer(postings, dtype=np.uint32)
+                found = np.minimum(np.searchsorted(postings, names), len(postings) - 1)
+                counts += postings[found] == names
+        top = np.lexsort((first, -counts))[:k]
+        return list(zip(names[top].tolist(), counts[top].tolist()))
+
+    def candidates(self, mention: str, threshold: float = 0.0) -> List[str]:
+        """Return KB names sharing the most trigrams with `mention` (at most `max_candidates`).
+
+        Names whose length alone rules out a similarity ratio >= `threshold` are skipped.
+        """
+        n = len(mention)
+        if threshold > 0:
+            lo, hi = n * threshold / (2 - threshold), n * (2 - threshold) / threshold
+        else:
+            lo, hi = 0, float("inf")
+        grams = _trigrams(mention)
+        ranked = [(c, self._names[i]) for i, c in self._count((self._postings.get(g) for g in grams), self._lengths, lo, hi)]
+        if self.store is not None:
+            counts = self._count((self.store.postings(g) for g in grams), self.store.lengths, lo, hi)
+            ranked += [(c, self.store.name(i)) for i, c in counts]
+            ranked.sort(key=lambda x: x[0], reverse=True)
+        return list(dict.fromkeys(name for _, name in ranked[:self.max_candidates]))
+
+    def _score(self, mention: str, names: Iterable[str], threshold: float) -> Optional[Tuple[str, float]]:
+        # SequenceMatcher caches its analysis of seq2, so the mention is set once
+        s = difflib.SequenceMatcher()
+        s.set_seq2(mention)
+        best, best_score = None, -1.0
+        for name in names:
+            s.set_seq1(name)
+            if s.real_quick_ratio() < threshold or s.quick_ratio() < threshold:
+                continue
+            score = s.ratio()
+            if score >= threshold and (score > best_score or (score == best_score and name > best)):
+                best, best_score = name, score
+        if best is None:
+            return None
+        return best, difflib.SequenceMatcher(None, mention, best).ratio()
 
     def link(self, mention: str, top_n: int = 3, threshold: float = 0.6) -> Optional[Tuple[str, float]]:
         """Return best KB key and similarity score, or None if below threshold."""
-        if not self.kb:
+        if len(self.kb) != self._kb_size:
+            self._index_missing()
+        if not self._indexed and self.store is None:
             return None
-        names = list(self.kb.keys())
-        # use difflib's SequenceMatcher via get_close_matches
-        matches = difflib.get_close_matches(mention, names, n=top_n, cutoff=threshold)
-        if not matches:
-            # still compute best ratio to provide a best-effort candidate
-            best = max(names, key=lambda n: difflib.SequenceMatcher(None, mention, n).ratio())
-            score = difflib.SequenceMatcher(None, mention, best).ratio()
-            return (best, score) if score >= threshold else None
-        best = matches[0]
-        score = difflib.SequenceMatcher(None, mention, best).ratio()
-        return (best, score)
-
-    def bulk_link(self, mentions: Iterable[str], **kwargs):
-        return {m: self.link(m, **kwargs) for m in mentions}
+        # exact and alias fast paths; every kb and database name is in `_indexed`
+        if mention in self._indexed or (self.store is not None and mention in self.store):
+            return (mention, 1.0)
+        alias = self._aliases.get(mention.lower())
+        if alias is None and self.store is not None:
+            alias = self.store.alias(mention.lower())
+        if alias is not None:
+            return (alias, 1.0)
+        return self._score(mention, self.candidates(mention, threshold), threshold)
+
+    def get_metadata(self, name: str) -> Optional[Dict]:
+        """Metadata of a linked KB entry; store and database entries are fetched only here, on demand."""
+        if name in self.kb:
+            return self.kb[name]
+        if self.store is not None and name in self.store:
+            return self.store.get(name)
+        return self.database.get(name) if self.database is not None else None
+
+    def bulk_metadata(self, names: Iterable[str]) -> Dict[str, Dict]:
+        """Metadata for many linked names; database entries are fetched in batched queries."""
+        names = list(dict.fromkeys(names))
+        found = {n: self.kb[n] for n in names if n in self.kb}
+        if self.store is not None:
+            found.update((n, self.store[n]) for n in names if n not in found and n in self.store)
+        if self.database is not None:
+            found.update(self.database.get_many(n for n in names if n not in found))
+        return found
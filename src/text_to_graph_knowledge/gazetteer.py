@@ -0,0 +1,151 @@
+"""Aho–Corasick automaton for matching large gazetteers in one pass over the text.
+
+All terms are compiled into a single automaton, so matching costs one scan of
+the text regardless of how many terms (drug names, anatomy terms, ...) are
+loaded. The C implementation from `pyahocorasick` is used when installed;
+otherwise a pure-Python automaton with the same interface is built.
+"""
+from collections import deque
+import re
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+
+def fold_case(text: str) -> str:
+    """Lower-case `text` without changing its length, so offsets stay valid."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # a few characters (e.g. "İ") lower-case to several code points
+    return "".join(c.lower()[:1] or c for c in text)
+
+
+def _is_word(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+def is_whole_word(text: str, start: int, end: int) -> bool:
+    """True when text[start:end] neither starts nor ends in the middle of a word (like regex \\b)."""
+    if start > 0 and _is_word(text[start - 1]) and _is_word(text[start]):
+        return False
+    return not (end < len(text) and _is_word(text[end]) and _is_word(text[end - 1]))
+
+
+class AhoCorasick:
+    """Multi-term matcher returning every (start, end, value) occurrence.
+
+    Parameters
+    ----------
+    case_insensitive : bool
+        Match on case-folded text (offsets refer to the original text).
+    whole_words : bool
+        Only report matches that do not start or end inside a word.
+    """
+
+    def __init__(self, case_insensitive: bool = False, whole_words: bool = True):
+        self.case_insensitive = case_insensitive
+        self.whole_words = whole_words
+        self._terms: Dict[str, List[Any]] = {}
+        self._automaton = None
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, term: str, value: Any) -> None:
+        """Register `term`; a term added several times reports all of its values."""
+        if not term:
+            return
+        key = fold_case(term) if self.case_insensitive else term
+        self._terms.setdefault(key, []).append(value)
+        self._automaton = None
+
+    def build(self) -> None:
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for key, values in self._terms.items():
+                automaton.add_word(key, (len(key), values))
+            if self._terms:
+                automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            self._automaton = _PyAutomaton(self._terms)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        if not self._terms:
+            return
+        if self._automaton is None:
+            self.build()
+        haystack = fold_case(text) if self.case_insensitive else text
+        for end, (length, values) in self._automaton.iter(haystack):
+            end += 1
+            start = end - length
+            if self.whole_words and not is_whole_word(text, start, end):
+                continue
+            for value in values:
+                yield start, end, value
+
+
+class _PyAutomaton:
+    """Pure-Python goto/fail/output automaton mirroring `ahocorasick.Automaton.iter`."""
+
+    def __init__(self, terms: Dict[str, List[Any]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[int, List[Any]]]] = [[]]
+        for key, values in terms.items():
+            state = 0
+            for ch in key:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((len(key), values))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                # outputs of the longest proper suffix are reported too
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+        # from the root state, jump straight to the next character that can start a term
+        self.first = re.compile("[" + "".join(re.escape(c) for c in self.goto[0]) + "]") if self.goto[0] else None
+
+    def iter(self, text: str) -> Iterator[Tuple[int, Tuple[int, List[Any]]]]:
+        if self.first is None:
+            return
+        goto, fail, out, search = self.goto, self.fail, self.out, self.first.search
+        state = 0
+        i, n = 0, len(text)
+        while i < n:
+            if not state:
+                m = search(text, i)
+                if m is None:
+                    return
+                i = m.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for match in out[state]:
+                yield i, match
+            i += 1
+
+
+def load_gazetteer(path: str, encoding: str = "utf-8") -> List[str]:
+    """Read a gazetteer file with one term per line (blank lines and '#' comments are skipped)."""
+    with open(path, "r", encoding=encoding) as fh:
+        return [line.strip() for line in fh if line.strip() and not line.lstrip().startswith("#")]
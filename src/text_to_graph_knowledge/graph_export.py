@@ -0,0 +1,408 @@
+"""Bulk export of pipeline output (records of `run_pipeline.py`) to Neo4j / Memgraph.
+
+Entities, documents and relations of many records are first gathered into a
+`GraphAccumulator`, which deduplicates entity nodes by their linked KB id (the
+surface form for unlinked mentions) and edges by (start, type, end), counting
+repeats. `CypherExporter` then writes everything through one session as
+parameterised `UNWIND $rows MERGE ...` statements of `batch_size` rows, one
+statement per node label / relationship type. `write_csv` produces the files
+for the offline `neo4j-admin database import` path instead.
+
+The exporter only needs an object with the `neo4j` driver's `session()` API,
+so `RecordingDriver` can stand in for a database (e.g. `--dry-run`).
+
+Example:
+    python -m text_to_graph_knowledge.graph_export results.jsonl --uri bolt://localhost:7687 --user neo4j --password secret
+    python -m text_to_graph_knowledge.graph_export results.jsonl --csv import_dir
+    python -m text_to_graph_knowledge.graph_export results.t2g --csv import_dir
+
+Record streams (`record_stream`) are read column-selectively: the document
+text, coreference clusters and co-occurrence edges are never decoded.
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+
+from .record_stream import RecordStreamReader, is_record_stream
+
+# NER label -> additional node label; every entity node is also an :Entity
+NODE_LABELS = {
+    "PERSON": "Person",
+    "ORG": "Organization",
+    "ORGANIZATION": "Organization",
+    "GPE": "Location",
+    "LOC": "Location",
+    "LOCATION": "Location",
+    "EVENT": "Event",
+    "DATE": "Date",
+}
+
+# record fields used by `GraphAccumulator.add_record`
+GRAPH_COLUMNS = ("doc_index", "sentence_spans", "entities_by_sentence", "linked_entities", "relations")
+
+_NOT_IDENTIFIER = re.compile(r"\W+")
+
+
+def relationship_type(predicate: str) -> str:
+    """Cypher relationship type for a relation predicate, e.g. "works_for" -> "WORKS_FOR"."""
+    rel_type = _NOT_IDENTIFIER.sub("_", predicate).strip("_").upper()
+    return rel_type or "RELATED_TO"
+
+
+def quote_identifier(name: str) -> str:
+    """Backtick-quote a label or relationship type for Cypher (e.g. `1ST_OWNER` is not a bare identifier)."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a JSON Lines file, one at a time."""
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a JSON Lines file or, with only the graph's columns, of a record stream."""
+    if is_record_stream(path):
+        return RecordStreamReader(path).iter_records(GRAPH_COLUMNS)
+    return iter_jsonl(path)
+
+
+def document_id(doc_index: int, source: Optional[str] = None) -> str:
+    """Id of a document node: `doc_index` restarts at 0 in every pipeline output, so it is
+    qualified by the output it came from, e.g. "results.jsonl#12"."""
+    return f"{source}#{doc_index}" if source is not None else str(doc_index)
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+class GraphAccumulator:
+    """Entity nodes, document nodes and edges gathered across pipeline records.
+
+    Entities are keyed by their linked KB id, so every mention of the same KB
+    entry, in any document, becomes one node; unlinked mentions are keyed by
+    their surface form. An entity's node label is its most frequent NER label.
+    Documents are keyed by `document_id(doc_index, source)`, so the records of
+    several pipeline outputs never share a document node.
+    """
+
+    def __init__(self) -> None:
+        # entity id -> {"id", "name", "kb_id", "mentions"}
+        self.entities: Dict[str, Dict[str, Any]] = {}
+        self._labels: Dict[str, Counter] = {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        # (start id, type, end id) -> count
+        self.relations: Counter = Counter()
+        # (document id, entity id) -> mention count
+        self.mentions: Counter = Counter()
+
+    def _entity_id(self, mention: str, linked: Dict[str, Any]) -> str:
+        link = linked.get(mention)
+        entity_id = link[0] if link else mention
+        node = self.entities.get(entity_id)
+        if node is None:
+            node = self.entities[entity_id] = {
+                "id": entity_id, "name": entity_id, "kb_id": entity_id if link else None, "mentions": 0,
+            }
+            self._labels[entity_id] = Counter()
+        return entity_id
+
+    def add_record(self, record: Dict[str, Any], source: Optional[str] = None) -> None:
+        """Add one `run_pipeline` output record read from output `source` (e.g. its path)."""
+        doc_index = record["doc_index"]
+        doc_id = document_id(doc_index, source)
+        linked = record.get("linked_entities") or {}
+        sentences = record["sentences"] if "sentences" in record else record.get("sentence_spans", ())
+        self.documents[doc_id] = {"id": doc_id, "source": source, "doc_index": doc_index, "n_sentences": len(sentences)}
+        for sentence_entities in record.get("entities_by_sentence", ()):
+            for mention, label in sentence_entities:
+                entity_id = self._entity_id(mention, linked)
+                self.entities[entity_id]["mentions"] += 1
+                self._labels[entity_id][label] += 1
+                self.mentions[doc_id, entity_id] += 1
+        for subject, predicate, obj in record.get("relations", ()):
+            start, end = self._entity_id(subject, linked), self._entity_id(obj, linked)
+            self.relations[start, relationship_type(predicate), end] += 1
+
+    def add_records(self, records: Iterable[Dict[str, Any]], source: Optional[str] = None) -> "GraphAccumulator":
+        for record in records:
+            self.add_record(record, source)
+        return self
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "GraphAccumulator":
+        """Gather the records of a `run_pipeline.py` output file, streaming it line by line."""
+        return cls().add_records(iter_jsonl(path), source=path)
+
+    def node_label(self, entity_id: str) -> Optional[str]:
+        labels = self._labels[entity_id]
+        return NODE_LABELS.get(labels.most_common(1)[0][0]) if labels else None
+
+    def entity_rows(self) -> Dict[Optional[str], List[Dict[str, Any]]]:
+        """Entity property rows grouped by node label (None: no label beyond :Entity)."""
+        groups: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for entity_id, node in self.entities.items():
+            groups.setdefault(self.node_label(entity_id), []).append(node)
+        return groups
+
+    def relation_rows(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Relation rows {"start", "end", "count"} grouped by relationship type."""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for (start, rel_type, end), count in self.relations.items():
+            groups.setdefault(rel_type, []).append({"start": start, "end": end, "count": count})
+        return groups
+
+    def mention_rows(self) -> List[Dict[str, Any]]:
+        return [{"doc": doc, "entity": entity_id, "count": count} for (doc, entity_id), count in self.mentions.items()]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entities": len(self.entities),
+            "documents": len(self.documents),
+            "relations": len(self.relations),
+            "mentions": len(self.mentions),
+        }
+
+
+class CypherExporter:
+    """Write a `GraphAccumulator` with batched, parameterised MERGE statements.
+
+    Loads are idempotent: entity `mentions`, relation `count` and MENTIONS
+    `count` are all overwritten with the accumulated values, so re-running an
+    export (e.g. after a failed batch) leaves the same graph. Counts are not
+    added across exports; pass every pipeline output of a corpus to one export.
+
+    Parameters
+    ----------
+    driver : object
+        `neo4j.Driver` (also works against Memgraph over Bolt) or a `RecordingDriver`.
+    database : str, optional
+        Database name passed to `driver.session` (leave unset for Memgraph).
+    batch_size : int
+        Rows sent per `UNWIND $rows` statement.
+    dialect : str
+        "neo4j" or "memgraph"; only changes the schema statements.
+    """
+
+    def __init__(self, driver, database: Optional[str] = None, batch_size: int = 1000, dialect: str = "neo4j") -> None:
+        if dialect not in ("neo4j", "memgraph"):
+            raise ValueError(f"Unknown dialect '{dialect}'. Choose 'neo4j' or 'memgraph'.")
+        self.driver = driver
+        self.database = database
+        self.batch_size = max(1, int(batch_size))
+        self.dialect = dialect
+
+    def schema_statements(self) -> List[str]:
+        """Uniqueness constraints that back the MERGE lookups."""
+        if self.dialect == "memgraph":
+            return [
+                "CREATE CONSTRAINT ON (n:Entity) ASSERT n.id IS UNIQUE",
+                "CREATE CONSTRAINT ON (d:Document) ASSERT d.id IS UNIQUE",
+                "CREATE INDEX ON :Entity(id)",
+                "CREATE INDEX ON :Document(id)",
+            ]
+        return [
+            "CREATE CONSTRAINT entity_id IF NOT EXISTS FOR (n:Entity) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT document_id IF NOT EXISTS FOR (d:Document) REQUIRE d.id IS UNIQUE",
+        ]
+
+    @staticmethod
+    def entity_query(label: Optional[str]) -> str:
+        # labels and relationship types cannot be parameters, so each gets its own statement
+        set_label = f" SET n:{quote_identifier(label)}" if label else ""
+        return (
+            "UNWIND $rows AS row "
+            "MERGE (n:Entity {id: row.id}) "
+            "SET n.name = row.name, n.kb_id = row.kb_id, n.mentions = row.mentions"
+            f"{set_label}"
+        )
+
+    @staticmethod
+    def document_query() -> str:
+        return (
+            "UNWIND $rows AS row MERGE (d:Document {id: row.id}) "
+            "SET d.source = row.source, d.doc_index = row.doc_index, d.n_sentences = row.n_sentences"
+        )
+
+    @staticmethod
+    def relation_query(rel_type: str) -> str:
+        return (
+            "UNWIND $rows AS row "
+            "MATCH (a:Entity {id: row.start}) MATCH (b:Entity {id: row.end}) "
+            f"MERGE (a)-[r:{quote_identifier(rel_type)}]->(b) "
+            "SET r.count = row.count"
+        )
+
+    @staticmethod
+    def mention_query() -> str:
+        return (
+            "UNWIND $rows AS row "
+            "MATCH (d:Document {id: row.doc}) MATCH (n:Entity {id: row.entity}) "
+            "MERGE (d)-[r:MENTIONS]->(n) SET r.count = row.count"
+        )
+
+    def statements(self, graph: GraphAccumulator) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """(query, rows) batches in dependency order: nodes before the edges that match them."""
+        for label, rows in graph.entity_rows().items():
+            query = self.entity_query(label)
+            for batch in _chunks(rows, self.batch_size):
+                yield query, batch
+        for batch in _chunks(list(graph.documents.values()), self.batch_size):
+            yield self.document_query(), batch
+        for rel_type, rows in graph.relation_rows().items():
+            query = self.relation_query(rel_type)
+            for batch in _chunks(rows, self.batch_size):
+                yield query, batch
+        for batch in _chunks(graph.mention_rows(), self.batch_size):
+            yield self.mention_query(), batch
+
+    def write(self, graph: GraphAccumulator, create_schema: bool = True) -> int:
+        """Write `graph` over a single session, one transaction per batch; returns the batch count."""
+        kwargs = {"database": self.database} if self.database else {}
+        n_batches = 0
+        with self.driver.session(**kwargs) as session:
+            if create_schema:
+                for statement in self.schema_statements():
+                    session.run(statement).consume()
+            for query, rows in self.statements(graph):
+                session.execute_write(lambda tx, q=query, r=rows: tx.run(q, rows=r).consume())
+                n_batches += 1
+        return n_batches
+
+
+def write_csv(graph: GraphAccumulator, directory: str) -> Dict[str, str]:
+    """Write `neo4j-admin database import` CSV files into `directory`; returns kind -> path."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "entities": os.path.join(directory, "entities.csv"),
+        "documents": os.path.join(directory, "documents.csv"),
+        "relations": os.path.join(directory, "relations.csv"),
+        "mentions": os.path.join(directory, "mentions.csv"),
+    }
+    with open(paths["entities"], "w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(["id:ID(Entity)", "name", "kb_id", "mentions:int", ":LABEL"])
+        for entity_id, node in graph.entities.items():
+            label = graph.node_label(entity_id)
+            w.writerow([entity_id, node["name"], node["kb_id"] or "", node["mentions"], f"Entity;{label}" if label else "Entity"])
+    with open(paths["documents"], "w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(["id:ID(Document)", "source", "doc_index:int", "n_sentences:int", ":LABEL"])
+        for doc in graph.documents.values():
+            w.writerow([doc["id"], doc["source"] or "", doc["doc_index"], doc["n_sentences"], "Document"])
+    with open(paths["relations"], "w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow([":START_ID(Entity)", ":END_ID(Entity)", ":TYPE", "count:int"])
+        for (start, rel_type, end), count in graph.relations.items():
+            w.writerow([start, end, rel_type, count])
+    with open(paths["mentions"], "w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow([":START_ID(Document)", ":END_ID(Entity)", ":TYPE", "count:int"])
+        for (doc, entity_id), count in graph.mentions.items():
+            w.writerow([doc, entity_id, "MENTIONS", count])
+    return paths
+
+
+def import_command(paths: Dict[str, str], database: str = "neo4j") -> str:
+    """The `neo4j-admin` command that loads the files written by `write_csv`."""
+    return (
+        f"neo4j-admin database import full --nodes={paths['entities']} --nodes={paths['documents']} "
+        f"--relationships={paths['relations']} --relationships={paths['mentions']} {database}"
+    )
+
+
+class _RecordingResult:
+    def consume(self) -> None:
+        return None
+
+
+class RecordingSession:
+    """Session stand-in that records every (query, parameters) it is asked to run."""
+
+    def __init__(self, log: List[Tuple[str, Dict[str, Any]]]) -> None:
+        self.log = log
+
+    def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> _RecordingResult:
+        self.log.append((query, dict(parameters or {}, **kwargs)))
+        return _RecordingResult()
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(self, *args, **kwargs)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "RecordingSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class RecordingDriver:
+    """Driver stand-in for dry runs and tests; `queries` holds everything that was run."""
+
+    def __init__(self) -> None:
+        self.queries: List[Tuple[str, Dict[str, Any]]] = []
+        self.sessions = 0
+
+    def session(self, **kwargs) -> RecordingSession:
+        self.sessions += 1
+        return RecordingSession(self.queries)
+
+    def close(self) -> None:
+        pass
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load run_pipeline.py output into Neo4j / Memgraph.")
+    parser.add_argument("inputs", nargs="+", help="JSONL files or record streams written by run_pipeline.py")
+    parser.add_argument("--uri", default="bolt://localhost:7687", help="Bolt URI (default: bolt://localhost:7687)")
+    parser.add_argument("--user", default="neo4j")
+    parser.add_argument("--password", default=os.getenv("NEO4J_PASSWORD", ""))
+    parser.add_argument("--database", help="Database name (Neo4j only)")
+    parser.add_argument("--dialect", default="neo4j", choices=("neo4j", "memgraph"))
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per UNWIND statement (default: 1000)")
+    parser.add_argument("--no-schema", action="store_true", help="Do not create uniqueness constraints")
+    parser.add_argument("--csv", metavar="DIR", help="Write neo4j-admin import CSVs to DIR instead of connecting")
+    parser.add_argument("--dry-run", action="store_true", help="Record the statements instead of sending them")
+    args = parser.parse_args(argv)
+
+    graph = GraphAccumulator()
+    for path in args.inputs:
+        graph.add_records(iter_records(path), source=path)
+    print("Gathered " + ", ".join(f"{v} {k}" for k, v in graph.stats().items()))
+
+    if args.csv:
+        paths = write_csv(graph, args.csv)
+        print(f"Wrote import files to {args.csv}; load them with:\n  {import_command(paths, args.database or 'neo4j')}")
+        return
+
+    if args.dry_run:
+        driver = RecordingDriver()
+    else:
+        # the driver is only needed when talking to a database
+        from neo4j import GraphDatabase
+        driver = GraphDatabase.driver(args.uri, auth=(args.user, args.password) if args.user else None)
+    try:
+        exporter = CypherExporter(driver, database=args.database, batch_size=args.batch_size, dialect=args.dialect)
+        n_batches = exporter.write(graph, create_schema=not args.no_schema)
+    finally:
+        driver.close()
+    print(f"Wrote {n_batches} batch(es) of up to {args.batch_size} rows")
+    if args.dry_run:
+        for query, params in driver.queries:
+            print(f"{len(params.get('rows', ()))} rows: {query}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
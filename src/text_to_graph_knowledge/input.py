@@ -2,10 +2,167 @@
 
 This module provides a small OOP wrapper around textual input sources and simple
 preprocessing steps commonly used in downstream pipelines.
+
+`AnalysedDocument` is the shared, columnar analysis of one document: sentence
+offsets, token offsets and lower-cased token ids, computed once and accepted by
+every pipeline stage so that nothing re-tokenises the text.
 """
-from typing import List, Iterable, Optional
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, islice
+from typing import Dict, List, Iterable, Optional, Tuple
 import re
 
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+_TOKEN = re.compile(r"\w+")
+_TOKEN_SPLIT = re.compile(r"(\w+)")
+
+
+def _token_columns(text: str, start: int, end: int) -> Tuple[array, array, List[str]]:
+    """Start offsets, end offsets and strings of the `\\w+` tokens of text[start:end].
+
+    `re.split` alternates separators and tokens, so the offsets are running sums
+    of the piece lengths; no match objects are created.
+    """
+    pieces = _TOKEN_SPLIT.split(text[start:end] if start or end != len(text) else text)
+    offsets = array("i", accumulate(map(len, pieces), initial=start))
+    return offsets[1:-1:2], offsets[2::2], pieces[1::2]
+
+
+class Vocabulary:
+    """Token <-> integer id mapping; ids follow first appearance."""
+
+    def __init__(self, tokens: Iterable[str] = ()) -> None:
+        self.index: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        for t in tokens:
+            self.index.setdefault(t, len(self.index))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.index
+
+    @property
+    def tokens(self) -> List[str]:
+        # dict order is id order: the missing tokens are the newest keys, read from the end
+        missing = len(self.index) - len(self._tokens)
+        if missing:
+            self._tokens.extend(reversed(list(islice(reversed(self.index), missing))))
+        return self._tokens
+
+    def add(self, token: str) -> int:
+        """Id of `token`, adding it if it is new."""
+        return self.index.setdefault(token, len(self.index))
+
+    def add_many(self, tokens: Iterable[str]) -> List[int]:
+        """Ids of `tokens`, adding the new ones."""
+        index = self.index
+        setdefault = index.setdefault
+        return [setdefault(t, len(index)) for t in tokens]
+
+
+class AnalysedDocument:
+    """Sentence and token columns of one document, built once and shared by all stages.
+
+    Tokens are `\\w+` runs inside sentences (the `TextInput.tokenize` rule);
+    their ids index the lower-cased forms in `vocab`, which is normally shared
+    by every document of a process. Token strings are only materialised by the
+    accessors that return them.
+
+    Attributes
+    ----------
+    text : str
+        The document.
+    vocab : Vocabulary
+        Lower-cased token vocabulary.
+    sentence_starts, sentence_ends : array.array
+        Character offsets of each sentence.
+    sentence_tokens : array.array
+        Token row offsets per sentence: the tokens of sentence `i` are rows
+        `sentence_tokens[i]:sentence_tokens[i + 1]`.
+    token_starts, token_ends, token_ids : array.array
+        One value per token.
+    """
+
+    def __init__(self, text: str, sentence_spans: Iterable[Tuple[int, int]], vocab: Optional[Vocabulary] = None) -> None:
+        self.text = text
+        self.vocab = vocab if vocab is not None else Vocabulary()
+        spans = list(sentence_spans)
+        self.sentence_starts = array("i", [s for s, _ in spans])
+        self.sentence_ends = array("i", [e for _, e in spans])
+
+        # tokens are split out of the lower-cased text, whose offsets are the same unless
+        # lower-casing changed the length (e.g. "İ") or depends on context (final sigma);
+        # the token strings only live until they have been looked up in the vocabulary
+        lowered = text.lower()
+        lower_once = len(lowered) == len(text) and "Σ" not in text
+        source = lowered if lower_once else text
+        starts, ends, tokens = _token_columns(source, 0, len(source))
+        rows = [0]
+        for s, e in spans:
+            lo, hi = bisect_left(starts, s), bisect_left(starts, e)
+            if lo != rows[-1] or (hi > lo and ends[hi - 1] > e):
+                break
+            rows.append(hi)
+        if len(rows) != len(spans) + 1 or rows[-1] != len(starts):
+            # some token lies between sentences or crosses a boundary: tokenise sentence by sentence
+            starts, ends, tokens, rows = array("i"), array("i"), [], [0]
+            for s, e in spans:
+                s_starts, s_ends, s_tokens = _token_columns(source, s, e)
+                starts.extend(s_starts)
+                ends.extend(s_ends)
+                tokens.extend(s_tokens)
+                rows.append(len(tokens))
+        if not lower_once:
+            tokens = [t.lower() for t in tokens]
+        self.sentence_tokens = array("i", rows)
+        self.token_starts = starts
+        self.token_ends = ends
+        self.token_ids = array("i", self.vocab.add_many(tokens))
+
+    @classmethod
+    def from_text(cls, text: str, vocab: Optional[Vocabulary] = None) -> "AnalysedDocument":
+        return cls(text, TextInput.from_string(text).sentence_spans(0), vocab)
+
+    def __len__(self) -> int:
+        """Number of sentences."""
+        return len(self.sentence_starts)
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self.token_ids)
+
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        return list(zip(self.sentence_starts, self.sentence_ends))
+
+    def sentence(self, sid: int) -> str:
+        return self.text[self.sentence_starts[sid]:self.sentence_ends[sid]]
+
+    def sentences(self) -> List[str]:
+        """Sentence strings, as returned by `TextInput.split_sentences`."""
+        text = self.text
+        return [text[s:e] for s, e in zip(self.sentence_starts, self.sentence_ends)]
+
+    def token_rows(self, sid: int) -> range:
+        return range(self.sentence_tokens[sid], self.sentence_tokens[sid + 1])
+
+    def sentence_token_ids(self, sid: int) -> array:
+        return self.token_ids[self.sentence_tokens[sid]:self.sentence_tokens[sid + 1]]
+
+    def token_sequences(self) -> List[List[str]]:
+        """Lower-cased tokens per sentence, as `TextInput.tokenize` returns them.
+
+        The strings are the vocabulary's own, so no new ones are allocated.
+        """
+        tokens, ids, rows = self.vocab.tokens, self.token_ids, self.sentence_tokens
+        return [[tokens[i] for i in ids[rows[k]:rows[k + 1]]] for k in range(len(rows) - 1)]
+
+    def token_text(self, row: int) -> str:
+        """Original-case surface of token `row`."""
+        return self.text[self.token_starts[row]:self.token_ends[row]]
+
 
 class TextInput:
     """Container for one or more documents with preprocessing helpers.
@@ -35,16 +192,32 @@ class TextInput:
     def get_doc(self, idx: int = 0) -> str:
         return self.docs[idx]
 
+    def sentence_spans(self, idx: int = 0) -> List[Tuple[int, int]]:
+        """Character (start, end) offsets of the sentences returned by `split_sentences`."""
+        text = self.get_doc(idx)
+        stripped = text.strip()
+        offset = len(text) - len(text.lstrip())
+        spans: List[Tuple[int, int]] = []
+        pos = 0
+        # naive; for production use a proper sentence tokenizer
+        for m in _SENTENCE_BREAK.finditer(stripped):
+            spans.append((offset + pos, offset + m.start()))
+            pos = m.end()
+        spans.append((offset + pos, offset + len(stripped)))
+        return [(s, e) for s, e in spans if e > s]
+
     def split_sentences(self, idx: int = 0) -> List[str]:
         """Very small sentence splitter using punctuation heuristics."""
         text = self.get_doc(idx)
-        # naive; for production use a proper sentence tokenizer
-        sentences = re.split(r"(?<=[.!?])\s+", text.strip())
-        return [s for s in sentences if s]
+        return [text[s:e] for s, e in self.sentence_spans(idx)]
+
+    def analyse(self, idx: int = 0, vocab: Optional[Vocabulary] = None) -> AnalysedDocument:
+        """Sentence and token columns of document `idx` (see `AnalysedDocument`)."""
+        return AnalysedDocument(self.get_doc(idx), self.sentence_spans(idx), vocab)
 
     def tokenize(self, sentence: str) -> List[str]:
         """Whitespace + punctuation tokenizer; returns lowercase tokens."""
-        tokens = re.findall(r"\w+", sentence)
+        tokens = _TOKEN.findall(sentence)
         return [t.lower() for t in tokens]
 
     def preprocess(self, lower: bool = True, remove_extra_ws: bool = True) -> None:
@@ -0,0 +1,229 @@
+"""Compact, memory-mapped on-disk knowledge base for `EntityLinker`.
+
+A JSON KB (name -> metadata) is converted once into a single binary file holding
+the sorted names, an offset table, the serialised metadata, per-name lengths,
+alias keys and the character-trigram postings used for candidate generation.
+`MmapKB` maps that file read-only: every process linking against it shares the
+same page-cache pages, nothing is copied into Python dicts, and metadata is only
+decoded for the entries that are actually looked up.
+
+Build:
+    python -m text_to_graph_knowledge.kb_store kb.json kb.bin
+"""
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+import argparse
+import json
+import mmap
+import struct
+import sys
+
+MAGIC = b"PTGKB001"
+# magic, n_names, n_grams, n_aliases, then the byte offset of each section
+_HEADER = struct.Struct("<8s3Q11Q")
+_SECTIONS = (
+    "name_offsets", "names", "meta_offsets", "meta", "lengths",
+    "gram_offsets", "grams", "post_offsets", "postings", "alias_offsets", "aliases",
+)
+
+
+def trigrams(text: str) -> set:
+    """Lower-cased, space-padded character trigrams used by the linker's candidate index."""
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _pad(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+def _blob(items: Iterable[bytes]) -> Tuple[array, bytes]:
+    offsets = array("Q", [0])
+    parts = []
+    for item in items:
+        parts.append(item)
+        offsets.append(offsets[-1] + len(item))
+    return offsets, b"".join(parts)
+
+
+def build_kb_store(kb: Dict[str, Dict], path: str) -> None:
+    """Write `kb` (name -> metadata) to `path` in the memory-mappable format."""
+    names = sorted(kb, key=lambda n: n.encode("utf-8"))
+    name_offsets, names_blob = _blob(n.encode("utf-8") for n in names)
+    meta_offsets, meta_blob = _blob(json.dumps(kb[n], ensure_ascii=False).encode("utf-8") for n in names)
+    lengths = array("I", (len(n) for n in names))
+
+    postings: Dict[str, array] = {}
+    aliases: Dict[str, int] = {}
+    for idx, name in enumerate(names):
+        for gram in trigrams(name):
+            postings.setdefault(gram, array("I")).append(idx)
+        metadata = kb[name]
+        if isinstance(metadata, dict):
+            for alias in metadata.get("aliases", ()) or ():
+                aliases.setdefault(alias.lower(), idx)
+
+    grams = sorted(postings, key=lambda g: g.encode("utf-8"))
+    gram_offsets, grams_blob = _blob(g.encode("utf-8") for g in grams)
+    post_offsets = array("Q", [0])
+    flat = array("I")
+    for g in grams:
+        flat.extend(postings[g])
+        post_offsets.append(len(flat))
+
+    alias_keys = sorted(aliases, key=lambda a: a.encode("utf-8"))
+    alias_offsets, alias_blob = _blob(a.encode("utf-8") for a in alias_keys)
+    alias_targets = array("I", (aliases[a] for a in alias_keys))
+
+    body = bytearray()
+    offsets = []
+    for section in (
+        name_offsets.tobytes(), names_blob, meta_offsets.tobytes(), meta_blob, lengths.tobytes(),
+        gram_offsets.tobytes(), grams_blob, post_offsets.tobytes(), flat.tobytes(),
+        # alias targets follow the alias keys, 8-byte aligned
+        alias_offsets.tobytes(), alias_blob + b"\0" * (-len(alias_blob) % 8) + alias_targets.tobytes(),
+    ):
+        offsets.append(_HEADER.size + len(body))
+        body.extend(section)
+        _pad(body)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(names), len(grams), len(alias_keys), *offsets))
+        f.write(body)
+
+
+def is_kb_store(path: str) -> bool:
+    """True when `path` starts with the store's magic bytes."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class MmapKB:
+    """Read-only, memory-mapped KB produced by `build_kb_store`.
+
+    Behaves like a read-only mapping of name -> metadata; entries are addressed
+    internally by their position in the sorted name table.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self._mm, 0)
+        if header[0] != MAGIC:
+            raise ValueError(f"{path} is not a KB store file.")
+        self.n_names, self.n_grams, self.n_aliases = header[1:4]
+        off = dict(zip(_SECTIONS, header[4:]))
+        view = memoryview(self._mm)
+
+        def ints(name: str, count: int, fmt: str) -> memoryview:
+            size = struct.calcsize(fmt)
+            return view[off[name]:off[name] + count * size].cast(fmt)
+
+        self._name_offsets = ints("name_offsets", self.n_names + 1, "Q")
+        self._names_base = off["names"]
+        self._meta_offsets = ints("meta_offsets", self.n_names + 1, "Q")
+        self._meta_base = off["meta"]
+        self.lengths = ints("lengths", self.n_names, "I")
+        self._gram_offsets = ints("gram_offsets", self.n_grams + 1, "Q")
+        self._grams_base = off["grams"]
+        self._post_offsets = ints("post_offsets", self.n_grams + 1, "Q")
+        self._postings = ints("postings", self._post_offsets[self.n_grams], "I")
+        self._alias_offsets = ints("alias_offsets", self.n_aliases + 1, "Q")
+        self._alias_base = off["aliases"]
+        targets = off["aliases"] + self._alias_offsets[self.n_aliases]
+        targets += -targets % 8
+        self._alias_targets = view[targets:targets + 4 * self.n_aliases].cast("I")
+
+    # -- raw access ------------------------------------------------------
+
+    def _bytes(self, base: int, offsets: memoryview, i: int) -> bytes:
+        return self._mm[base + offsets[i]:base + offsets[i + 1]]
+
+    def name(self, idx: int) -> str:
+        return self._bytes(self._names_base, self._name_offsets, idx).decode("utf-8")
+
+    def metadata(self, idx: int) -> Dict:
+        return json.loads(self._bytes(self._meta_base, self._meta_offsets, idx))
+
+    @staticmethod
+    def _search(count: int, key: bytes, get) -> Optional[int]:
+        i = bisect_left(range(count), key, key=get)
+        return i if i < count and get(i) == key else None
+
+    def index_of(self, name: str) -> Optional[int]:
+        return self._search(
+            self.n_names, name.encode("utf-8"), lambda i: self._bytes(self._names_base, self._name_offsets, i)
+        )
+
+    def postings(self, gram: str) -> Optional[memoryview]:
+        g = self._search(
+            self.n_grams, gram.encode("utf-8"), lambda i: self._bytes(self._grams_base, self._gram_offsets, i)
+        )
+        if g is None:
+            return None
+        return self._postings[self._post_offsets[g]:self._post_offsets[g + 1]]
+
+    def alias(self, alias: str) -> Optional[str]:
+        """Return the canonical name for a lower-cased alias, if any."""
+        a = self._search(
+            self.n_aliases, alias.encode("utf-8"), lambda i: self._bytes(self._alias_base, self._alias_offsets, i)
+        )
+        return self.name(self._alias_targets[a]) if a is not None else None
+
+    # -- mapping protocol ------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.n_names
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.index_of(name) is not None
+
+    def __getitem__(self, name: str) -> Dict:
+        idx = self.index_of(name)
+        if idx is None:
+            raise KeyError(name)
+        return self.metadata(idx)
+
+    def get(self, name: str, default=None):
+        idx = self.index_of(name)
+        return self.metadata(idx) if idx is not None else default
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.name(i) for i in range(self.n_names))
+
+    keys = __iter__
+
+    def close(self) -> None:
+        for attr in ("_name_offsets", "_meta_offsets", "lengths", "_gram_offsets", "_post_offsets",
+                     "_postings", "_alias_offsets", "_alias_targets"):
+            getattr(self, attr).release()
+        self._mm.close()
+        self._file.close()
+
+    def __getstate__(self):
+        # re-open the mapping in the receiving process instead of copying it
+        return {"path": self.path}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state["path"])
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert a JSON KB (name -> metadata) into a memory-mapped KB store.")
+    parser.add_argument("input", help="JSON file with a name -> metadata mapping")
+    parser.add_argument("output", help="Output KB store file")
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r", encoding="utf-8") as fh:
+        kb = json.load(fh)
+    build_kb_store(kb, args.output)
+    print(f"Wrote {len(kb)} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,48 +1,387 @@
-from typing import List, Tuple, Dict, Iterable
+"""Rule-based named entity recognition.
+
+Regex rules that start with a literal (optionally after an anchor such as
+``\\b``) and gazetteer terms are compiled into one Aho–Corasick automaton, so a
+single pass over the text finds every gazetteer hit and every offset where a
+literal-prefixed rule can match; only those rules are then tried, at those
+offsets. Rules without a literal prefix are scanned on their own. Candidate
+spans from all sources are resolved into non-overlapping entities.
+"""
+from array import array
+from bisect import bisect_right
+from typing import Any, List, Tuple, Dict, Iterable, Optional, Sequence, Union
+import hashlib
 import re
 
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from .gazetteer import AhoCorasick, is_whole_word
+from .input import AnalysedDocument, TextInput
+
 
 Entity = Tuple[str, str]
+# (start, end, text, label) with character offsets into the input text
+Span = Tuple[int, int, str, str]
+
+
+def literal_prefix(pattern: re.Pattern) -> str:
+    """Literal text every match of `pattern` must start with ("" when there is none)."""
+    if pattern.flags & re.IGNORECASE or not isinstance(pattern.pattern, str):
+        return ""
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except re.error:
+        return ""
+    prefix = []
+    for op, av in parsed.data:
+        if op == sre_parse.AT and not prefix:
+            continue  # zero-width anchors are re-checked by `pattern.match`
+        if op != sre_parse.LITERAL:
+            break
+        prefix.append(chr(av))
+    return "".join(prefix)
+
+
+class EntityColumns:
+    """Columnar NER output for one document.
+
+    Rows are entities in text order; `start`/`end` are character offsets into
+    `text`, `label` indexes into `labels` and `sentence` is the sentence id.
+
+    Attributes
+    ----------
+    start, end, label, sentence : array.array
+        One value per entity.
+    labels : List[str]
+        Label vocabulary shared with the model.
+    sentence_rows : array.array
+        Row offsets per sentence: the entities of sentence `i` are rows
+        `sentence_rows[i]:sentence_rows[i + 1]`.
+    sentence_starts, sentence_ends : array.array
+        Character offsets of each sentence in `text`.
+    """
+
+    def __init__(self, text: str, labels: List[str], n_sentences: int):
+        self.text = text
+        self.labels = labels
+        self.start = array("i")
+        self.end = array("i")
+        self.label = array("i")
+        self.sentence = array("i")
+        self.sentence_rows = array("i", [0] * (n_sentences + 1))
+        self.sentence_starts = array("i", [0] * n_sentences)
+        self.sentence_ends = array("i", [0] * n_sentences)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def entity(self, row: int) -> Entity:
+        return self.text[self.start[row]:self.end[row]], self.labels[self.label[row]]
+
+    def sentence_entities(self, sid: int) -> List[Entity]:
+        return [self.entity(r) for r in range(self.sentence_rows[sid], self.sentence_rows[sid + 1])]
+
+    def by_sentence(self) -> List[List[Entity]]:
+        """Entities bucketed per sentence, in the `entities_by_sentence` format."""
+        return [self.sentence_entities(i) for i in range(len(self.sentence_rows) - 1)]
+
+    def to_dict(self) -> Dict[str, List]:
+        return {
+            "start": self.start.tolist(),
+            "end": self.end.tolist(),
+            "label": self.label.tolist(),
+            "sentence": self.sentence.tolist(),
+            "sentence_starts": self.sentence_starts.tolist(),
+            "sentence_ends": self.sentence_ends.tolist(),
+            "labels": list(self.labels),
+        }
+
+    @classmethod
+    def from_dict(cls, text: str, data: Dict[str, Any]) -> "EntityColumns":
+        """Rebuild the columns of `text` from the output of `to_dict`."""
+        columns = cls(text, list(data["labels"]), len(data["sentence_starts"]))
+        columns.start.extend(data["start"])
+        columns.end.extend(data["end"])
+        columns.label.extend(data["label"])
+        columns.sentence.extend(data["sentence"])
+        columns.sentence_starts = array("i", data["sentence_starts"])
+        columns.sentence_ends = array("i", data["sentence_ends"])
+        # rows are in sentence order, so the offsets are a running count per sentence
+        rows = columns.sentence_rows
+        for sid in columns.sentence:
+            rows[sid + 1] += 1
+        for i in range(1, len(rows)):
+            rows[i] += rows[i - 1]
+        return columns
+
 
 class NERModel:
     """Named Entity Recognition interface and a small rule-based implementation.
 
+    Rules are `(pattern, label)` or `(pattern, label, priority)` tuples; gazetteers
+    map a label to an iterable of terms. Overlapping candidates are resolved by
+    priority (higher wins), then by length (longer wins), then by position
+    (earlier wins); remaining ties go to gazetteer terms, then to earlier rules.
+
+    Parameters
+    ----------
+    rules : iterable of tuple
+        Regex rules.
+    gazetteers : dict, optional
+        Label -> terms, matched as whole words.
+    priorities : dict, optional
+        Label -> priority, applied to rules and gazetteer terms without an
+        explicit priority (default 0).
+    case_insensitive_gazetteers : bool
+        Match gazetteer terms ignoring case.
+
     Methods
     -------
     train(corpus)
         Placeholder.
     predict(text)
         Return list of (entity_text, label) tuples.
+    predict_spans(text)
+        Return list of (start, end, entity_text, label) tuples.
+    predict_document(text, sentence_spans)
+        Scan a whole document once and return `EntityColumns`.
+    predict_batch(texts)
+        Return one list of (entity_text, label) tuples per text.
     """
 
-    def __init__(self, rules: Iterable[Tuple[str, str]] = ()):  # regex pattern -> label
+    def __init__(
+        self,
+        rules: Iterable[Tuple] = (),  # regex pattern -> label
+        gazetteers: Optional[Dict[str, Iterable[str]]] = None,
+        priorities: Optional[Dict[str, int]] = None,
+        case_insensitive_gazetteers: bool = False,
+    ):
+        self.priorities = dict(priorities or {})
+        self.case_insensitive_gazetteers = case_insensitive_gazetteers
+        # running digest of the gazetteer terms, which are only kept inside the automaton
+        self._gazetteer_digest = hashlib.sha256()
+        # label vocabulary used by the columnar output
+        self.labels: List[str] = []
+        self._label_ids: Dict[str, int] = {}
         # compile rules (pattern, label)
-        self.rules = [(re.compile(p), lbl) for p, lbl in rules]
+        self.rules: List[Tuple[re.Pattern, str]] = []
+        self._rule_priorities: List[int] = []
+        for rule in rules:
+            pattern, label = rule[0], rule[1]
+            self.rules.append((re.compile(pattern), label))
+            self.label_id(label)
+            self._rule_priorities.append(rule[2] if len(rule) > 2 else self.priorities.get(label, 0))
+
+        # one automaton holds the gazetteer terms and the literal prefixes of the rules
+        self._automaton = AhoCorasick(case_insensitive=case_insensitive_gazetteers, whole_words=False)
+        self._scanned: List[int] = []
+        for i, (pattern, _) in enumerate(self.rules):
+            prefix = literal_prefix(pattern)
+            if prefix:
+                self._automaton.add(prefix, i)
+            else:
+                self._scanned.append(i)
+        for label, terms in (gazetteers or {}).items():
+            self.add_gazetteer(label, terms)
+
+    def add_gazetteer(self, label: str, terms: Iterable[str], priority: Optional[int] = None) -> None:
+        """Add gazetteer terms for `label`; the automaton is rebuilt on the next prediction."""
+        if priority is None:
+            priority = self.priorities.get(label, 0)
+        self.label_id(label)
+        digest = self._gazetteer_digest
+        for term in terms:
+            self._automaton.add(term, (label, priority))
+            digest.update(f"{label}\0{priority}\0{term}\n".encode("utf-8"))
+
+    def fingerprint(self) -> str:
+        """Digest of the rules, gazetteers and matching options; changes whenever predictions may."""
+        digest = hashlib.sha256(self._gazetteer_digest.digest())
+        digest.update(repr((
+            [(p.pattern, p.flags, label) for p, label in self.rules],
+            self._rule_priorities,
+            sorted(self.priorities.items()),
+            self.case_insensitive_gazetteers,
+        )).encode("utf-8"))
+        return digest.hexdigest()
+
+    def label_id(self, label: str) -> int:
+        """Index of `label` in `labels`, adding it if it is new."""
+        idx = self._label_ids.get(label)
+        if idx is None:
+            idx = self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        return idx
 
     def train(self, *args, **kwargs):
         """Optional training method for pluggable models. Not implemented in rule-based version."""
         raise NotImplementedError("Training is backend-specific. Use a subclass that implements train().")
 
+    def _candidates(
+        self,
+        text: str,
+        sentence_spans: Optional[Sequence[Tuple[int, int]]] = None,
+        sentence_of: Optional[array] = None,
+    ) -> List[Tuple[int, int, int, int, str]]:
+        # every match is confined to its sentence (never filtered afterwards, which would lose
+        # the match a boundary-crossing one consumed); `sentence_of` maps characters to
+        # sentence ids (-1 between sentences), None means one sentence
+        if sentence_spans is None:
+            sentence_spans = [(0, len(text))]
+        candidates = []  # (priority, start, end, tie-break order, label)
+        for start, end, value in self._automaton.iter_matches(text):
+            if sentence_of is None:
+                sentence_end = len(text)
+            else:
+                sid = sentence_of[start]
+                if sid < 0:
+                    continue
+                sentence_end = sentence_spans[sid][1]
+            if isinstance(value, tuple):
+                label, priority = value
+                if end <= sentence_end and is_whole_word(text, start, end):
+                    candidates.append((priority, start, end, -1, label))
+            else:
+                m = self.rules[value][0].match(text, start, sentence_end)
+                if m is not None and m.end() > start:
+                    candidates.append((self._rule_priorities[value], start, m.end(), value, self.rules[value][1]))
+        sentence_starts = None
+        for i in self._scanned:
+            pattern, label = self.rules[i]
+            priority = self._rule_priorities[i]
+            if sentence_of is None:
+                candidates.extend(
+                    (priority, m.start(), m.end(), i, label) for m in pattern.finditer(text) if m.end() > m.start()
+                )
+                continue
+            # one scan over the whole text; a match that leaves its sentence is re-scanned
+            # within that sentence and the whole-text scan resumes at the next one
+            pos = 0
+            while pos is not None:
+                resume = None
+                for m in pattern.finditer(text, pos):
+                    start, end = m.span()
+                    if end == start:
+                        continue
+                    sid = sentence_of[start]
+                    if sid >= 0 and sentence_of[end - 1] == sid:
+                        candidates.append((priority, start, end, i, label))
+                        continue
+                    if sid >= 0:
+                        for m in pattern.finditer(text, start, sentence_spans[sid][1]):
+                            if m.end() > m.start():
+                                candidates.append((priority, m.start(), m.end(), i, label))
+                        sid += 1
+                    else:
+                        if sentence_starts is None:
+                            sentence_starts = [s for s, _ in sentence_spans]
+                        sid = bisect_right(sentence_starts, start)
+                    if sid < len(sentence_spans):
+                        resume = sentence_spans[sid][0]
+                    break
+                pos = resume
+        return candidates
+
+    @staticmethod
+    def _resolve(candidates: List[Tuple[int, int, int, int, str]], length: int) -> List[Tuple[int, int, str]]:
+        candidates.sort(key=lambda c: (-c[0], c[1] - c[2], c[1], c[3]))
+        # one byte per character of text marks the offsets already taken by an accepted entity
+        taken = bytearray(length)
+        accepted: List[Tuple[int, int, str]] = []
+        for _, start, end, _, label in candidates:
+            if taken.find(1, start, end) != -1:
+                continue
+            taken[start:end] = b"\x01" * (end - start)
+            accepted.append((start, end, label))
+        accepted.sort()
+        return accepted
+
+    def predict_spans(self, text: str) -> List[Span]:
+        """Perform entity recognition and return non-overlapping spans in text order.
+
+        Returns
+        -------
+        List[Tuple[int, int, str, str]]
+            Sequence of (start, end, matched_text, label).
+        """
+        return [(s, e, text[s:e], label) for s, e, label in self._resolve(self._candidates(text), len(text))]
+
+    def predict_document(
+        self,
+        text: Union[str, AnalysedDocument],
+        sentence_spans: Optional[Sequence[Tuple[int, int]]] = None,
+    ) -> EntityColumns:
+        """Scan `text` once and bucket entities by sentence.
+
+        `sentence_spans` are (start, end) offsets as returned by
+        `TextInput.sentence_spans` (computed from `text` when omitted, taken
+        from the document when `text` is an `AnalysedDocument`). Each rule
+        scans the whole text once; only a match that leaves its sentence is
+        re-scanned with the sentence's end as the end position, so entities
+        never span sentences and a match is never lost to one that would have.
+
+        Returns
+        -------
+        EntityColumns
+            Columnar entities with character offsets into `text`.
+        """
+        if isinstance(text, AnalysedDocument):
+            text, sentence_spans = text.text, text.sentence_spans()
+        elif sentence_spans is None:
+            sentence_spans = TextInput.from_string(text).sentence_spans(0)
+        # sentence id of every character (-1 between sentences)
+        sentence_of = array("i", [-1]) * len(text)
+        for sid, (s, e) in enumerate(sentence_spans):
+            sentence_of[s:e] = array("i", [sid]) * (e - s)
+        columns = EntityColumns(text, self.labels, len(sentence_spans))
+        columns.sentence_starts = array("i", [s for s, _ in sentence_spans])
+        columns.sentence_ends = array("i", [e for _, e in sentence_spans])
+        accepted = self._resolve(self._candidates(text, sentence_spans, sentence_of), len(text))
+
+        label_id = self.label_id
+        columns.start.extend([start for start, _, _ in accepted])
+        columns.end.extend([end for _, end, _ in accepted])
+        columns.label.extend([label_id(label) for _, _, label in accepted])
+        columns.sentence.extend([sentence_of[start] for start in columns.start])
+        rows = columns.sentence_rows
+        for sid in columns.sentence:
+            rows[sid + 1] += 1
+        for i in range(1, len(rows)):
+            rows[i] += rows[i - 1]
+        return columns
+
+    def predict_batch(self, texts: Sequence[str]) -> List[List[Entity]]:
+        """Run `predict` over many short texts (e.g. sentences) with a single scan.
+
+        The texts are joined with newlines and treated as sentences of one
+        document; rules anchored with ``^``/``$`` see the joined text.
+        """
+        spans = []
+        pos = 0
+        for t in texts:
+            spans.append((pos, pos + len(t)))
+            pos += len(t) + 1
+        return self.predict_document("\n".join(texts), spans).by_sentence()
+
     def predict(self, text: str) -> List[Entity]:
-        """Perform entity recognition using the configured regex rules.
+        """Perform entity recognition using the configured regex rules and gazetteers.
 
         Returns
         -------
         List[Tuple[str, str]]
             Sequence of (matched_text, label).
         """
-        entities: List[Entity] = []
-        for pattern, label in self.rules:
-            for m in pattern.finditer(text):
-                entities.append((m.group(0), label))
-        return entities
+        return [(t, label) for _, _, t, label in self.predict_spans(text)]
 
 
 # small factory for quick use
-def default_rule_based_ner() -> NERModel:
+def default_rule_based_ner(gazetteers: Optional[Dict[str, Iterable[str]]] = None) -> NERModel:
     rules = [
         (r"\b[A-Z][a-z]+\s[A-Z][a-z]+\b", "PERSON"),  # simple two-name rule
         (r"\b[A-Z][a-z]+\b", "PROPER_NOUN"),
         (r"\b\d{4}\b", "DATE"),
     ]
-    return NERModel(rules=rules)
+    return NERModel(rules=rules, gazetteers=gazetteers)
@@ -0,0 +1,175 @@
+"""CPU-only neural coreference backend built on `fastcoref`.
+
+The model is loaded from local files the first time a resolver in the process
+needs it and is then shared by every resolver instance of that process (each
+pipeline worker loads it once). Long documents are cut into overlapping windows
+of sentences, windows are sent to the model in batches, and clusters from
+different windows are merged whenever they share a mention in an overlap.
+
+Requires `pip install fastcoref` and a model directory such as a local copy of
+`biu-nlp/f-coref` (set `COREF_MODEL_PATH` or pass `model_path`).
+"""
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import re
+
+from .coreference_resolution import CoreferenceResolver, Mention
+from .input import AnalysedDocument
+
+DEFAULT_MODEL_PATH = os.getenv("COREF_MODEL_PATH", os.path.join("models", "f-coref"))
+
+_TOKEN = re.compile(r"\w+")
+# (model path, model class, threads) -> loaded model, one per process
+_MODELS: Dict[Tuple[str, str, Optional[int]], Any] = {}
+
+
+def load_model(model_path: str = DEFAULT_MODEL_PATH, model_class: str = "FCoref", num_threads: Optional[int] = None):
+    """Load (once per process) a fastcoref model from local files on the CPU."""
+    key = (model_path, model_class, num_threads)
+    if key not in _MODELS:
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(
+                f"Coreference model directory '{model_path}' not found. "
+                f"Download the model once and point COREF_MODEL_PATH at it."
+            )
+        # never touch a GPU or the network
+        os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        import torch
+        import fastcoref
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        _MODELS[key] = getattr(fastcoref, model_class)(model_name_or_path=model_path, device="cpu")
+    return _MODELS[key]
+
+
+def sentence_windows(n_sentences: int, window: int, overlap: int) -> List[Tuple[int, int]]:
+    """(start, end) sentence ranges of `window` sentences, consecutive ranges sharing `overlap`."""
+    if window <= overlap:
+        raise ValueError("window must be larger than overlap")
+    spans = []
+    start = 0
+    while start < n_sentences:
+        end = min(start + window, n_sentences)
+        spans.append((start, end))
+        if end == n_sentences:
+            break
+        start = end - overlap
+    return spans
+
+
+def _surface(sentences: Sequence[str], si: int, cs: int, ce: int) -> str:
+    # a predicted span may run past the end of its sentence into the next one
+    text, j = sentences[si], si
+    while ce > len(text) and j + 1 < len(sentences):
+        j += 1
+        text += " " + sentences[j]
+    return text[cs:ce]
+
+
+class NeuralCoreferenceResolver(CoreferenceResolver):
+    """Neural coreference resolver with the `CoreferenceResolver.resolve` output format.
+
+    Mentions are returned as (sent_idx, token_idx, mention_text), where
+    `token_idx` is the index of the mention's first `\\w+` token in its sentence.
+
+    Parameters
+    ----------
+    model_path : str
+        Local model directory.
+    model_class : str
+        fastcoref model class, "FCoref" (fast) or "LingMessCoref" (more accurate).
+    window : int
+        Sentences per window.
+    overlap : int
+        Sentences shared by consecutive windows; clusters are merged through them.
+    batch_size : int
+        Windows passed to the model per `predict` call.
+    max_tokens_in_batch : int
+        Upper bound on tokens per forward pass inside `predict`.
+    num_threads : int, optional
+        Torch intra-op threads (defaults to torch's choice).
+    """
+
+    def __init__(
+        self,
+        model_path: str = DEFAULT_MODEL_PATH,
+        model_class: str = "FCoref",
+        window: int = 20,
+        overlap: int = 4,
+        batch_size: int = 8,
+        max_tokens_in_batch: int = 10000,
+        num_threads: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self.model_path = model_path
+        self.model_class = model_class
+        self.window = window
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.max_tokens_in_batch = max_tokens_in_batch
+        self.num_threads = num_threads
+
+    @property
+    def model(self):
+        return load_model(self.model_path, self.model_class, self.num_threads)
+
+    def _predict(self, texts: List[str]) -> List[List[List[Tuple[int, int]]]]:
+        results = self.model.predict(texts=texts, max_tokens_in_batch=self.max_tokens_in_batch)
+        return [r.get_clusters(as_strings=False) for r in results]
+
+    def resolve(self, sentences: Sequence[str]) -> Dict[int, List[Mention]]:
+        """Resolve mentions into clusters, window by window, merging across window overlaps."""
+        if isinstance(sentences, AnalysedDocument):
+            sentences = sentences.sentences()
+        windows = sentence_windows(len(sentences), self.window, self.overlap)
+        parent: Dict[Tuple[int, int, int], Tuple[int, int, int]] = {}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for b in range(0, len(windows), self.batch_size):
+            batch = windows[b:b + self.batch_size]
+            texts, offsets = [], []
+            for start, end in batch:
+                starts, pos = [], 0
+                for s in sentences[start:end]:
+                    starts.append(pos)
+                    pos += len(s) + 1
+                texts.append(" ".join(sentences[start:end]))
+                offsets.append((start, starts))
+
+            for (first_sentence, starts), clusters in zip(offsets, self._predict(texts)):
+                for cluster in clusters:
+                    if not cluster:
+                        continue
+                    keys = []
+                    for cs, ce in cluster:
+                        k = bisect_right(starts, cs) - 1
+                        # a mention is identified by its sentence and character span in that sentence
+                        keys.append((first_sentence + k, cs - starts[k], ce - starts[k]))
+                    for key in keys:
+                        parent.setdefault(key, key)
+                    root = find(keys[0])
+                    for key in keys[1:]:
+                        other = find(key)
+                        if other != root:
+                            parent[other] = root
+
+        groups: Dict[Tuple[int, int, int], List[Tuple[int, int, int]]] = {}
+        for key in sorted(parent):
+            groups.setdefault(find(key), []).append(key)
+
+        resolved: Dict[int, List[Mention]] = {}
+        for cid, members in enumerate(sorted(groups.values(), key=lambda m: m[0])):
+            resolved[cid] = [
+                (si, len(_TOKEN.findall(sentences[si], 0, cs)), _surface(sentences, si, cs, ce))
+                for si, cs, ce in members
+            ]
+        return resolved
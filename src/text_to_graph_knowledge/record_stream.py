@@ -0,0 +1,230 @@
+"""Compact, column-grouped binary format for `run_pipeline.py` output records.
+
+A record stream is the magic bytes followed by length-prefixed msgpack frames:
+a header frame naming the columns, then one frame per group of records. Each
+group frame holds the number of records, the symbols first used by the group
+and one msgpack blob per column, so a reader only decodes the columns it is
+asked for and skips the others as opaque bytes.
+
+Compared with the JSON Lines output, sentences are stored as (start, end)
+offsets into the document text instead of repeated strings, and entity labels
+and relation predicates are interned into the shared symbol table. Records read
+back are equal to what `json.loads` gives for the corresponding JSONL line.
+
+Requires `pip install msgpack`.
+
+Example:
+    python run_pipeline.py --input docs.jsonl --output results.t2g --output-format msgpack
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+import struct
+
+MAGIC = b"PTGREC01"
+VERSION = 1
+_LENGTH = struct.Struct("<I")
+
+COLUMNS = (
+    "doc_index", "text", "sentences", "entities_by_sentence", "coref_clusters",
+    "linked_entities", "cooccurrence_top_edges", "relations",
+)
+# readable without being stored: the sentences as [start, end] offsets into the text
+DERIVED_COLUMNS = ("sentence_spans",)
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise ImportError("msgpack is not installed; `pip install msgpack` to use record streams.") from exc
+    return msgpack
+
+
+def is_record_stream(path: str) -> bool:
+    """True when `path` starts with the record stream's magic bytes."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def sentence_offsets(text: str, sentences: Sequence[str]) -> List[int]:
+    """Flat [start0, end0, start1, end1, ...] offsets of consecutive sentences in `text`."""
+    offsets: List[int] = []
+    pos = 0
+    for sentence in sentences:
+        start = text.find(sentence, pos)
+        if start < 0:
+            raise ValueError(f"Sentence {len(offsets) // 2} does not occur in the document text.")
+        pos = start + len(sentence)
+        offsets += (start, pos)
+    return offsets
+
+
+# column -> function(record, intern) giving the stored value of that record
+_ENCODERS: Dict[str, Callable[[Dict[str, Any], Callable[[str], int]], Any]] = {
+    "sentences": lambda r, intern: sentence_offsets(r["text"], r["sentences"]),
+    "entities_by_sentence": lambda r, intern: [
+        [x for mention, label in sentence for x in (mention, intern(label))] for sentence in r["entities_by_sentence"]
+    ],
+    "relations": lambda r, intern: [x for s, p, o in r["relations"] for x in (s, intern(p), o)],
+}
+
+# column -> function(stored value, symbols) giving the record value as JSON would
+_DECODERS: Dict[str, Callable[[Any, List[str]], Any]] = {
+    "entities_by_sentence": lambda v, symbols: [
+        [[sentence[i], symbols[sentence[i + 1]]] for i in range(0, len(sentence), 2)] for sentence in v
+    ],
+    # JSON object keys are strings
+    "coref_clusters": lambda v, symbols: {str(k): mentions for k, mentions in v.items()},
+    "relations": lambda v, symbols: [[v[i], symbols[v[i + 1]], v[i + 2]] for i in range(0, len(v), 3)],
+}
+
+
+class RecordStreamWriter:
+    """Buffered record stream writer with the interface of `run_pipeline.JSONLWriter`.
+
+    Every `flush_every` records are encoded column by column into one frame.
+    """
+
+    def __init__(self, path: str, flush_every: int = 100) -> None:
+        self._msgpack = _msgpack()
+        self.path = path
+        self.flush_every = max(1, int(flush_every))
+        self._fh = open(path, "wb")
+        self._buffer: List[Dict[str, Any]] = []
+        self._symbols: Dict[str, int] = {}
+        self._new_symbols: List[str] = []
+        self.count = 0
+        self._fh.write(MAGIC)
+        self._write_frame({"version": VERSION, "columns": list(COLUMNS)})
+
+    def _write_frame(self, value: Any) -> None:
+        payload = self._msgpack.packb(value, use_bin_type=True)
+        self._fh.write(_LENGTH.pack(len(payload)))
+        self._fh.write(payload)
+
+    def _intern(self, symbol: str) -> int:
+        i = self._symbols.get(symbol)
+        if i is None:
+            i = self._symbols[symbol] = len(self._symbols)
+            self._new_symbols.append(symbol)
+        return i
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            packb = self._msgpack.packb
+            blobs = []
+            for column in COLUMNS:
+                encode = _ENCODERS.get(column)
+                values = [encode(r, self._intern) for r in self._buffer] if encode else [r[column] for r in self._buffer]
+                blobs.append(packb(values, use_bin_type=True))
+            self._write_frame([len(self._buffer), self._new_symbols, blobs])
+            self._buffer.clear()
+            self._new_symbols = []
+        self._fh.flush()
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self.flush()
+            self._fh.close()
+
+    def __enter__(self) -> "RecordStreamWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class RecordStreamReader:
+    """Reads a record stream, decoding only the selected columns.
+
+    Parameters
+    ----------
+    path : str
+        File written by `RecordStreamWriter`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._msgpack = _msgpack()
+        self.path = path
+        with open(path, "rb") as fh:
+            self.columns = tuple(self._read_header(fh)["columns"])
+
+    def _read_frame(self, fh) -> Optional[Any]:
+        prefix = fh.read(_LENGTH.size)
+        if not prefix:
+            return None
+        (length,) = _LENGTH.unpack(prefix)
+        payload = fh.read(length)
+        if len(payload) != length:
+            raise ValueError(f"Truncated record stream '{self.path}'.")
+        return self._msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+    def _read_header(self, fh) -> Dict[str, Any]:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{self.path}' is not a record stream.")
+        header = self._read_frame(fh)
+        if not header or header.get("version") != VERSION:
+            raise ValueError(f"Unsupported record stream version in '{self.path}'.")
+        return header
+
+    def _select(self, columns: Optional[Iterable[str]]) -> List[str]:
+        if columns is None:
+            return list(self.columns)
+        selected = list(columns)
+        unknown = [c for c in selected if c not in self.columns and c not in DERIVED_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown column(s) {unknown}. Choose from {self.columns + DERIVED_COLUMNS}.")
+        return selected
+
+    def iter_batches(self, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, List[Any]]]:
+        """Column -> values of every record, one dict per stored group of records."""
+        selected = self._select(columns)
+        # stored columns that have to be unpacked for the selection
+        needed = {"sentences" if c == "sentence_spans" else c for c in selected}
+        if "sentences" in selected:
+            needed.add("text")
+        position = {c: i for i, c in enumerate(self.columns)}
+        unpackb = self._msgpack.unpackb
+        symbols: List[str] = []
+        with open(self.path, "rb") as fh:
+            self._read_header(fh)
+            while True:
+                frame = self._read_frame(fh)
+                if frame is None:
+                    return
+                _, new_symbols, blobs = frame
+                symbols.extend(new_symbols)
+                stored = {c: unpackb(blobs[position[c]], raw=False, strict_map_key=False) for c in needed}
+                batch: Dict[str, List[Any]] = {}
+                for column in selected:
+                    if column == "sentences":
+                        batch[column] = [
+                            [text[o[i]:o[i + 1]] for i in range(0, len(o), 2)]
+                            for text, o in zip(stored["text"], stored["sentences"])
+                        ]
+                    elif column == "sentence_spans":
+                        batch[column] = [[o[i:i + 2] for i in range(0, len(o), 2)] for o in stored["sentences"]]
+                    elif column in _DECODERS:
+                        decode = _DECODERS[column]
+                        batch[column] = [decode(v, symbols) for v in stored[column]]
+                    else:
+                        batch[column] = stored[column]
+                yield batch
+
+    def iter_records(self, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Records holding only the selected columns (all stored columns by default)."""
+        for batch in self.iter_batches(columns):
+            keys = list(batch)
+            for values in zip(*batch.values()):
+                yield dict(zip(keys, values))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_records()
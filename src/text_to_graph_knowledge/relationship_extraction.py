@@ -4,8 +4,10 @@ This module defines a high-level class that accepts entity spans and sentences a
 returns candidate relationships. It is intentionally modular so you can swap in
 more advanced extractors.
 """
-from typing import List, Tuple, Iterable, Optional
+from typing import List, Tuple, Iterable, Optional, Union
 
+from .input import AnalysedDocument
+from .named_entity_recognition import EntityColumns
 from .rule_based_relation_extraction import RuleBasedRelationExtractor, Relation
 
 
@@ -17,8 +19,12 @@ class RelationshipExtractor:
     def __init__(self, rule_extractor: Optional[RuleBasedRelationExtractor] = None):
         self.rule_extractor = rule_extractor or RuleBasedRelationExtractor()
 
-    def extract(self, sentences: Iterable[str], entities_by_sentence: Iterable[Iterable[Tuple[str, str]]]) -> List[Relation]:
-        """Return extracted relations from the corpus."""
+    def extract(
+        self,
+        sentences: Union[AnalysedDocument, Iterable[str]],
+        entities_by_sentence: Union[EntityColumns, Iterable[Iterable[Tuple[str, str]]]]
+    ) -> List[Relation]:
+        """Return extracted relations from the corpus (entities per sentence or `EntityColumns`)."""
         # prefer rule-based results
         results = self.rule_extractor.extract(sentences, entities_by_sentence)
         # placeholder: if rule-based returns nothing, you could add ML model here
@@ -3,11 +3,94 @@
 Rules are tuples of (left_label, relation_label, right_label, textual_patterns),
 where textual_patterns may contain placeholders {L} and {R} to be substituted by
 regexes that capture entity surfaces.
+
+Templates are compiled once: the literal anchor words of every pattern (e.g.
+"works at") go into a single keyword automaton, and a pattern is only tried on
+sentences where one of its anchors occurs. When both placeholders are
+constrained to entity labels, {L} and {R} are bound to the offsets of the
+recognised entities and only the text around and between them is matched, so
+the cost grows with the number of entities rather than with `.+?` backtracking.
 """
-from typing import List, Tuple, Dict, Iterable
+from bisect import bisect_right
+from collections import defaultdict
+from typing import List, Tuple, Dict, Iterable, Optional, Sequence, Set, Union
 import re
 
+from .gazetteer import AhoCorasick
+from .input import AnalysedDocument
+from .named_entity_recognition import EntityColumns, sre_parse
+
 Relation = Tuple[str, str, str]  # (left_text, relation_label, right_text)
+_PLACEHOLDER = re.compile(r"\{([LR])\}")
+
+
+def _literal_options(source: str) -> List[List[str]]:
+    """Literal requirements of a regex fragment; each item lists alternatives of which one must occur."""
+    try:
+        parsed = sre_parse.parse(source, re.I)
+    except re.error:
+        return []
+    options: List[List[str]] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            options.append(["".join(run)])
+            run.clear()
+
+    def branch_literals(av) -> Optional[List[str]]:
+        alternatives = []
+        for branch in av[1]:
+            if not branch or any(op != sre_parse.LITERAL for op, _ in branch):
+                return None
+            alternatives.append("".join(chr(c) for _, c in branch))
+        return alternatives
+
+    for op, av in parsed.data:
+        if op == sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        if op == sre_parse.SUBPATTERN and len(av[3].data) == 1 and av[3].data[0][0] == sre_parse.BRANCH:
+            op, av = av[3].data[0]
+        if op == sre_parse.BRANCH:
+            alternatives = branch_literals(av)
+            if alternatives:
+                options.append(alternatives)
+    flush()
+    return options
+
+
+def pattern_anchors(fragments: Iterable[str]) -> List[str]:
+    """Pick the most selective literal requirement of a template (empty when it has none)."""
+    best: List[str] = []
+    best_len = 0
+    for fragment in fragments:
+        for alternatives in _literal_options(fragment):
+            shortest = min(len(a.strip()) for a in alternatives)
+            # single literals beat alternations of the same length
+            if shortest >= 2 and (shortest, -len(alternatives)) > (best_len, -len(best)):
+                best, best_len = alternatives, shortest
+    return best
+
+
+class _Template:
+    """One compiled `{L} ... {R}` pattern."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.regex = re.compile(source.replace("{L}", r"(?P<L>.+?)").replace("{R}", r"(?P<R>.+?)"), re.I)
+        names = _PLACEHOLDER.findall(source)
+        parts = _PLACEHOLDER.split(source)[::2]
+        self.anchors = pattern_anchors(parts)
+        self.bound = None
+        if sorted(names) == ["L", "R"]:
+            try:
+                mid, post = (re.compile(p, re.I) if p else None for p in parts[1:])
+                pre_end = re.compile(f"(?:{parts[0]})\\Z", re.I) if parts[0] else None
+            except re.error:
+                return  # placeholder inside a group: only the plain regex works
+            self.bound = (names[0] == "L", pre_end, mid, post)
 
 
 class RuleBasedRelationExtractor:
@@ -19,37 +102,129 @@ class RuleBasedRelationExtractor:
 
     def __init__(self, rules: Iterable[Tuple[str, str, str, Iterable[str]]] = ()):  # label-label-text patterns
         self.rules = []
+        self._templates: List[Tuple[int, _Template]] = []  # (rule index, template)
+        self._always: List[int] = []  # templates without anchors, tried on every sentence
+        self._anchors = AhoCorasick(case_insensitive=True, whole_words=False)
         for left_label, rel_label, right_label, patterns in rules:
-            compiled = [re.compile(p.replace("{L}", r"(?P<L>.+?)").replace("{R}", r"(?P<R>.+?)"), re.I) for p in patterns]
-            self.rules.append((left_label, rel_label, right_label, compiled))
+            templates = [_Template(p) for p in patterns]
+            self.rules.append((left_label, rel_label, right_label, [t.regex for t in templates]))
+            for t in templates:
+                tid = len(self._templates)
+                self._templates.append((len(self.rules) - 1, t))
+                if t.anchors:
+                    for anchor in t.anchors:
+                        self._anchors.add(anchor, tid)
+                else:
+                    self._always.append(tid)
+        # when every rule constrains both labels, sentences without entities cannot yield relations
+        self._needs_entities = bool(self.rules) and all(l and r for l, _, r, _ in self.rules)
+
+    def _match(
+        self,
+        text: str,
+        lo: int,
+        hi: int,
+        spans: Sequence[Tuple[int, int]],
+        ent_map: Dict[str, List[str]],
+        active: Iterable[int],
+    ) -> List[Relation]:
+        """Run the templates `active` over text[lo:hi]; `spans` are entity offsets in `text`."""
+        results: List[Relation] = []
+        for tid in sorted(active):
+            rule_idx, template = self._templates[tid]
+            left_label, rel_label, right_label, _ = self.rules[rule_idx]
+            if left_label and right_label and template.bound is not None:
+                l_first, pre_end, mid, post = template.bound
+                for s1, e1 in spans:
+                    if pre_end is not None and pre_end.search(text, lo, s1) is None:
+                        continue
+                    for s2, e2 in spans:
+                        if s2 < e1 or (s2 != e1 if mid is None else mid.fullmatch(text, e1, s2) is None):
+                            continue
+                        if post is not None and post.match(text, e2, hi) is None:
+                            continue
+                        L, R = (text[s1:e1], text[s2:e2]) if l_first else (text[s2:e2], text[s1:e1])
+                        if left_label in ent_map.get(L.lower(), ()) and right_label in ent_map.get(R.lower(), ()):
+                            results.append((L, rel_label, R))
+                continue
+            # unconstrained placeholder: any text may fill it
+            for m in template.regex.finditer(text, lo, hi):
+                L = m.groupdict().get("L", "").strip()
+                R = m.groupdict().get("R", "").strip()
+                if not L or not R:
+                    continue
+                # verify that the extracted L and R match the requested entity labels
+                L_labels = ent_map.get(L.lower(), [])
+                R_labels = ent_map.get(R.lower(), [])
+                if (not left_label or left_label in L_labels) and (not right_label or right_label in R_labels):
+                    results.append((L, rel_label, R))
+        return results
+
+    def _active(self, text: str) -> Set[int]:
+        active = set(self._always)
+        active.update(tid for _, _, tid in self._anchors.iter_matches(text))
+        return active
 
     def extract_from_sentence(self, sentence: str, entities: Iterable[Tuple[str, str]]) -> List[Relation]:
         """Extract relations from a single sentence.
 
-        `entities` is an iterable of (entity_text, entity_label).
+        `entities` is an iterable of (entity_text, entity_label); their offsets
+        are recovered by searching the sentence for each surface.
         """
-        results: List[Relation] = []
         # build quick lookup by surface lowercased
         ent_map: Dict[str, List[str]] = {}
+        spans = set()
         for surf, label in entities:
             ent_map.setdefault(surf.lower(), []).append(label)
+            start = sentence.find(surf) if surf else -1
+            while start != -1:
+                spans.add((start, start + len(surf)))
+                start = sentence.find(surf, start + 1)
+        return self._match(sentence, 0, len(sentence), sorted(spans), ent_map, self._active(sentence))
 
-        for left_label, rel_label, right_label, patterns in self.rules:
-            for pat in patterns:
-                for m in pat.finditer(sentence):
-                    L = m.groupdict().get("L", "").strip()
-                    R = m.groupdict().get("R", "").strip()
-                    if not L or not R:
-                        continue
-                    # verify that the extracted L and R match the requested entity labels
-                    L_labels = ent_map.get(L.lower(), [])
-                    R_labels = ent_map.get(R.lower(), [])
-                    if (not left_label or left_label in L_labels) and (not right_label or right_label in R_labels):
-                        results.append((L, rel_label, R))
-        return results
+    def extract(
+        self,
+        sentences: Union[AnalysedDocument, Iterable[str]],
+        entities_by_sentence: Union[EntityColumns, Iterable[Iterable[Tuple[str, str]]]]
+    ) -> List[Relation]:
+        """Extract relations from every sentence.
 
-    def extract(self, sentences: Iterable[str], entities_by_sentence: Iterable[Iterable[Tuple[str, str]]]) -> List[Relation]:
+        `sentences` is a list of sentences or an `AnalysedDocument`.
+        `entities_by_sentence` is either one (entity_text, entity_label) list per
+        sentence or the `EntityColumns` returned by `NERModel.predict_document`,
+        whose entity offsets are used directly.
+        """
         all_rels: List[Relation] = []
+        if isinstance(entities_by_sentence, EntityColumns):
+            return self.extract_columns(entities_by_sentence)
+        if isinstance(sentences, AnalysedDocument):
+            sentences = sentences.sentences()
         for s, ents in zip(sentences, entities_by_sentence):
             all_rels.extend(self.extract_from_sentence(s, ents))
         return all_rels
+
+    def extract_columns(self, columns: EntityColumns) -> List[Relation]:
+        """Extract relations from a whole document with one anchor scan."""
+        text, rows = columns.text, columns.sentence_rows
+        starts, ends = columns.sentence_starts, columns.sentence_ends
+        active_by_sentence: Dict[int, Set[int]] = defaultdict(set)
+        for a_start, a_end, tid in self._anchors.iter_matches(text):
+            sid = bisect_right(starts, a_start) - 1
+            if sid >= 0 and a_end <= ends[sid]:
+                active_by_sentence[sid].add(tid)
+
+        all_rels: List[Relation] = []
+        for sid in range(len(starts)):
+            if rows[sid] == rows[sid + 1] and self._needs_entities:
+                continue
+            active = active_by_sentence.get(sid, set()) | set(self._always)
+            if not active:
+                continue
+            ent_map: Dict[str, List[str]] = {}
+            spans = []
+            for r in range(rows[sid], rows[sid + 1]):
+                surf, label = columns.entity(r)
+                ent_map.setdefault(surf.lower(), []).append(label)
+                spans.append((columns.start[r], columns.end[r]))
+            all_rels.extend(self._match(text, starts[sid], ends[sid], spans, ent_map, active))
+        return all_rels
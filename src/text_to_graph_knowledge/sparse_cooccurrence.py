@@ -0,0 +1,277 @@
+"""Sparse, vocabulary-indexed co-occurrence counting with NumPy/SciPy.
+
+Tokens are mapped to integer ids once, window pairs are generated with
+vectorised array operations and counted into a SciPy sparse matrix. Only the
+upper triangle (u <= v in id order) is stored, since co-occurrence is symmetric.
+Pairs are buffered and folded into the CSR accumulator in large batches, so a
+corpus of hundreds of millions of tokens is counted in memory proportional to
+the number of distinct pairs. Partial matrices (e.g. one per worker process)
+are combined with `merge`; a networkx graph is only built by `to_networkx`.
+"""
+from itertools import chain
+from typing import Iterable, List, Optional, Sequence, Tuple
+import json
+
+import numpy as np
+from scipy import sparse
+
+from .co_ocurrence_graphs import TopKEdges
+from .input import AnalysedDocument, Vocabulary
+
+Edge = Tuple[Tuple[str, str], int]
+
+
+def encode(vocab: Vocabulary, tokens: Sequence[str]) -> np.ndarray:
+    """Ids of `tokens` in `vocab`, adding unseen tokens to it."""
+    return np.array(vocab.add_many(tokens), dtype=np.int32)
+
+
+def window_pairs(ids: np.ndarray, lengths: Sequence[int], window_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Canonical (u <= v) id pairs of tokens at distance 1..window_size within each sequence.
+
+    `ids` is the concatenation of sequences whose lengths are `lengths`.
+    """
+    n = len(ids)
+    if n < 2:
+        empty = np.empty(0, dtype=ids.dtype)
+        return empty, empty
+    # position of the end of the sequence each token belongs to
+    seq_end = np.repeat(np.cumsum(lengths), lengths)
+    positions = np.arange(n)
+    rows, cols = [], []
+    for d in range(1, window_size + 1):
+        if d >= n:
+            break
+        keep = positions[:n - d] + d < seq_end[:n - d]
+        a, b = ids[:n - d][keep], ids[d:][keep]
+        rows.append(np.minimum(a, b))
+        cols.append(np.maximum(a, b))
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+class SparseCooccurrence:
+    """Accumulating co-occurrence counts over a growing vocabulary.
+
+    Parameters
+    ----------
+    window_size : int
+        Pairs are tokens at distance 1..window_size within a sequence.
+    flush_pairs : int
+        Buffered pairs above which they are summed into the CSR accumulator.
+    dtype : numpy dtype
+        Count type.
+    track_top : int
+        Keep the `track_top` heaviest edges up to date at every flush
+        (0 disables), so `top_edges` does not scan the matrix.
+    vocab : Vocabulary, optional
+        Vocabulary to index into, e.g. the one shared with `AnalysedDocument`
+        so that documents are counted from their token ids directly.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 2,
+        flush_pairs: int = 1 << 24,
+        dtype=np.int64,
+        track_top: int = 0,
+        vocab: Optional[Vocabulary] = None,
+    ) -> None:
+        self.window_size = max(1, int(window_size))
+        self.flush_pairs = flush_pairs
+        self.dtype = dtype
+        self.vocab = vocab if vocab is not None else Vocabulary()
+        self._csr = sparse.csr_matrix((0, 0), dtype=dtype)
+        self._pending: List[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]] = []
+        self._pending_size = 0
+        self.n_tokens = 0
+        self._top = TopKEdges(track_top) if track_top else None
+        self._strengths: Optional[np.ndarray] = None
+
+    # -- counting ----------------------------------------------------------
+
+    def add_sequences(self, token_sequences: Iterable[Sequence[str]]) -> None:
+        """Count window pairs of every token sequence (sequences never pair with each other)."""
+        sequences = [s for s in token_sequences if len(s)]
+        if not sequences:
+            return
+        lengths = [len(s) for s in sequences]
+        ids = encode(self.vocab, list(chain.from_iterable(sequences)))
+        self.n_tokens += len(ids)
+        rows, cols = window_pairs(ids, lengths, self.window_size)
+        self._add_pairs(rows, cols, None)
+
+    def add_document(self, doc: AnalysedDocument) -> None:
+        """Count window pairs of every sentence of an analysed document, straight from its token ids."""
+        if not doc.n_tokens:
+            return
+        if doc.vocab is self.vocab:
+            ids = np.frombuffer(doc.token_ids, dtype=np.int32)
+        else:
+            tokens = doc.vocab.tokens
+            ids = encode(self.vocab, [tokens[i] for i in doc.token_ids])
+        self.n_tokens += len(ids)
+        rows, cols = window_pairs(ids, np.diff(np.frombuffer(doc.sentence_tokens, dtype=np.int32)), self.window_size)
+        self._add_pairs(rows, cols, None)
+
+    def _add_pairs(self, rows: np.ndarray, cols: np.ndarray, data: Optional[np.ndarray]) -> None:
+        if not len(rows):
+            return
+        self._pending.append((rows, cols, data))
+        self._pending_size += len(rows)
+        if self._pending_size >= self.flush_pairs:
+            self.flush()
+
+    def flush(self) -> None:
+        """Fold buffered pairs into the CSR accumulator."""
+        n = len(self.vocab)
+        if self._csr.shape != (n, n):
+            self._csr.resize((n, n))
+        if not self._pending:
+            return
+        rows = np.concatenate([p[0] for p in self._pending])
+        cols = np.concatenate([p[1] for p in self._pending])
+        data = np.concatenate([
+            p[2].astype(self.dtype, copy=False) if p[2] is not None else np.ones(len(p[0]), dtype=self.dtype)
+            for p in self._pending
+        ])
+        self._pending = []
+        self._pending_size = 0
+        self._strengths = None
+        # duplicates are summed by the COO -> CSR conversion
+        batch = sparse.coo_matrix((data, (rows, cols)), shape=(n, n)).tocsr()
+        self._csr = self._csr + batch
+        if self._top is not None:
+            self._update_top(batch.tocoo())
+
+    def _update_top(self, touched: sparse.coo_matrix) -> None:
+        # counts only grow, so the new top-k lies within the old top-k plus the
+        # k heaviest of the edges touched by this batch
+        top = self._top
+        if len(top):
+            held = np.array(list(top.weights), dtype=np.int64)
+            for edge, w in zip(top.weights, np.asarray(self._csr[held[:, 0], held[:, 1]]).ravel()):
+                top.weights[edge] = int(w)
+            top.threshold = min(top.weights.values()) if len(top) >= top.k else 0
+        rows, cols = touched.row, touched.col
+        weights = np.asarray(self._csr[rows, cols]).ravel()
+        if len(weights) > top.k:
+            best = np.argpartition(-weights, top.k - 1)[:top.k]
+            rows, cols, weights = rows[best], cols[best], weights[best]
+        for r, c, w in zip(rows.tolist(), cols.tolist(), weights.tolist()):
+            if w > top.threshold:
+                top.update((r, c), w)
+
+    def merge(self, other: "SparseCooccurrence") -> None:
+        """Add the counts of `other` (e.g. a worker's partial matrix), remapping its vocabulary."""
+        other_matrix = other.matrix.tocoo()
+        if not len(other.vocab):
+            return
+        mapping = encode(self.vocab, other.vocab.tokens)
+        a, b = mapping[other_matrix.row], mapping[other_matrix.col]
+        self.n_tokens += other.n_tokens
+        self._add_pairs(np.minimum(a, b), np.maximum(a, b), other_matrix.data)
+
+    # -- access ------------------------------------------------------------
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """Upper-triangular CSR count matrix indexed by vocabulary id."""
+        self.flush()
+        return self._csr
+
+    @property
+    def n_edges(self) -> int:
+        return self.matrix.nnz
+
+    @property
+    def total(self) -> int:
+        """Number of window pairs counted."""
+        return int(self.matrix.data.sum())
+
+    def strength(self, token: str) -> int:
+        """Summed weight of the edges of `token` (a self-pair counts for both ends)."""
+        i = self.vocab.index.get(token)
+        if i is None:
+            return 0
+        m = self.matrix
+        if self._strengths is None or len(self._strengths) != m.shape[0]:
+            # row sums + column sums of the upper triangle, computed once per change
+            self._strengths = np.asarray(m.sum(axis=0)).ravel() + np.asarray(m.sum(axis=1)).ravel()
+        return int(self._strengths[i])
+
+    def weight(self, u: str, v: str) -> int:
+        i, j = self.vocab.index.get(u), self.vocab.index.get(v)
+        if i is None or j is None:
+            return 0
+        i, j = min(i, j), max(i, j)
+        return int(self.matrix[i, j])
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(row ids, column ids, weights) of every stored edge, in CSR order."""
+        m = self.matrix
+        rows = np.repeat(np.arange(m.shape[0], dtype=m.indices.dtype), np.diff(m.indptr))
+        return rows, m.indices, m.data
+
+    def top_edges(self, k: int = 10, min_weight: Optional[float] = None) -> List[Edge]:
+        """Top-k edges by weight as ((u, v), weight); ties keep (u, v) id order.
+
+        Edges lighter than `min_weight` are left out.
+        """
+        if k <= 0:
+            return []
+        tokens = self.vocab.tokens
+        if self._top is not None and k <= self._top.k:
+            self.flush()
+            return [((tokens[u], tokens[v]), w) for (u, v), w in self._top.top(k, min_weight)]
+        rows, cols, data = self.edges()
+        if not len(data):
+            return []
+        if min_weight is not None:
+            keep = np.flatnonzero(data >= min_weight)
+            rows, cols, data = rows[keep], cols[keep], data[keep]
+        if k < len(data):
+            threshold = data[np.argpartition(-data, k - 1)[k - 1]]
+            above = np.flatnonzero(data > threshold)
+            # ties at the k-th weight are broken by CSR position, i.e. (u, v) id order
+            tied = np.flatnonzero(data == threshold)[:k - len(above)]
+            candidates = np.concatenate([above, tied])
+        else:
+            candidates = np.arange(len(data))
+        order = candidates[np.lexsort((candidates, -data[candidates]))]
+        return [((tokens[rows[i]], tokens[cols[i]]), int(data[i])) for i in order]
+
+    def to_networkx(self):
+        """Export to an undirected, weighted networkx graph."""
+        import networkx as nx
+
+        rows, cols, data = self.edges()
+        tokens = self.vocab.tokens
+        G = nx.Graph()
+        G.add_weighted_edges_from((tokens[u], tokens[v], int(w)) for u, v, w in zip(rows, cols, data))
+        return G
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        m = self.matrix
+        np.savez_compressed(
+            path,
+            data=m.data, indices=m.indices, indptr=m.indptr, shape=np.array(m.shape),
+            vocab=np.frombuffer(json.dumps(self.vocab.tokens, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+            meta=np.array([self.window_size, self.n_tokens]),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SparseCooccurrence":
+        with np.load(path) as f:
+            window_size, n_tokens = (int(x) for x in f["meta"])
+            obj = cls(window_size=window_size)
+            obj.vocab = Vocabulary(json.loads(f["vocab"].tobytes().decode("utf-8")))
+            obj._csr = sparse.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+            obj.n_tokens = n_tokens
+        return obj
+
+    def __getstate__(self):
+        # ship only the folded matrix between processes
+        self.flush()
+        return self.__dict__.copy()
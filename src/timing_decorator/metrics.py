@@ -0,0 +1,345 @@
+"""Process-wide timers, counters and histograms for profiling pipeline stages.
+
+Instrumented code asks for the current registry with `get_metrics()` and records
+into it::
+
+    metrics = get_metrics()
+    with metrics.timer("stage_seconds", stage="ner"):
+        ...
+    metrics.count("documents_total")
+
+Until `enable_metrics()` is called the registry is `NULL_METRICS`, whose methods
+do nothing and whose `timer` returns a shared no-op context manager, so the
+instrumentation costs one method call per site. Every metric is identified by a
+name plus optional labels and is exported at the end of a run as a JSON summary
+(`write_json`) or in the Prometheus text exposition format (`write_prometheus`).
+
+A worker process records into its own registry; its `drain()`ed snapshot is
+folded into the parent's with `merge`.
+"""
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO, Tuple
+import json
+import math
+import re
+import sys
+import threading
+import time
+
+# upper bounds (seconds) of the histogram buckets used for timers
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_NOT_METRIC_NAME = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _key(name: str, labels: Dict[str, Any]) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_key(key: Key) -> str:
+    name, labels = key
+    name = _NOT_METRIC_NAME.sub("_", name)
+    if not labels:
+        return name
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return name + "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class Histogram:
+    """Bucketed distribution of observed values, with count, sum, min and max.
+
+    Parameters
+    ----------
+    buckets : sequence of float
+        Increasing bucket upper bounds; values above the last fall into +Inf.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets.")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (capped at the observed maximum)."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0, "sum": 0.0}
+        return {
+            "count": self.count, "sum": self.sum, "mean": self.sum / self.count,
+            "min": self.min, "max": self.max, "p50": self.quantile(0.5), "p95": self.quantile(0.95),
+        }
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_lock", "_start")
+
+    def __init__(self, histogram: Histogram, lock: threading.Lock) -> None:
+        self._histogram = histogram
+        self._lock = lock
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            self._histogram.observe(elapsed)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Registry of counters and histograms (timers are histograms of seconds)."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.counters: Dict[Key, float] = {}
+        self.histograms: Dict[Key, Histogram] = {}
+        self.started = time.time()
+        # request threads (e.g. concurrent LLM calls) share the registry
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def histogram(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: Any) -> Histogram:
+        key = _key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: Any) -> None:
+        histogram = self.histogram(name, buckets, **labels)
+        with self._lock:
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels: Any) -> _Timer:
+        """Context manager observing its wall time, in seconds, into histogram `name`."""
+        return _Timer(self.histogram(name, **labels), self._lock)
+
+    # -- aggregation -------------------------------------------------------
+
+    def drain(self) -> Dict[str, Any]:
+        """Snapshot of everything recorded so far, which is then cleared (e.g. to ship from a worker)."""
+        with self._lock:
+            snapshot = {"counters": self.counters, "histograms": self.histograms}
+            self.counters, self.histograms = {}, {}
+        return snapshot
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Add a `drain()` snapshot of another registry."""
+        with self._lock:
+            for key, value in snapshot["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, histogram in snapshot["histograms"].items():
+                if key in self.histograms:
+                    self.histograms[key].merge(histogram)
+                else:
+                    self.histograms[key] = histogram
+
+    # -- export ------------------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "elapsed_seconds": time.time() - self.started,
+            "counters": {_format_key(k): v for k, v in sorted(self.counters.items())},
+            "histograms": {_format_key(k): h.summary() for k, h in sorted(self.histograms.items())},
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.summary(), fh, indent=2)
+
+    def prometheus_text(self) -> str:
+        lines: List[str] = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = _NOT_METRIC_NAME.sub("_", name)
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{_format_key((metric, labels))} {value:g}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = _NOT_METRIC_NAME.sub("_", name)
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, n in zip(histogram.buckets + (math.inf,), histogram.counts):
+                cumulative += n
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{_format_key((metric + '_bucket', labels + (('le', le),)))} {cumulative}")
+            lines.append(f"{_format_key((metric + '_sum', labels))} {histogram.sum:g}")
+            lines.append(f"{_format_key((metric + '_count', labels))} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the Prometheus text format, e.g. for node_exporter's textfile collector."""
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.prometheus_text())
+
+
+class NullMetrics:
+    """Disabled registry: every recording method is a no-op."""
+
+    enabled = False
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        pass
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: Any) -> None:
+        pass
+
+    def timer(self, name: str, **labels: Any) -> _NullTimer:
+        return _NULL_TIMER
+
+
+NULL_METRICS = NullMetrics()
+_current: Any = NULL_METRICS
+
+
+def get_metrics():
+    """The registry instrumented code records into (`NULL_METRICS` unless enabled)."""
+    return _current
+
+
+def enable_metrics() -> Metrics:
+    """Start recording into a fresh registry and return it."""
+    global _current
+    _current = Metrics()
+    return _current
+
+
+def disable_metrics() -> None:
+    global _current
+    _current = NULL_METRICS
+
+
+def timed(name: str = "function_seconds", **labels: Any) -> Callable:
+    """Decorator timing every call into histogram `name`, labelled with the function name."""
+
+    def decorator(func: Callable) -> Callable:
+        func_labels = dict(labels, function=func.__qualname__)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = _current
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            with metrics.timer(name, **func_labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressReporter:
+    """Periodic "done/total, rate, ETA" line for long runs.
+
+    Parameters
+    ----------
+    total : int, optional
+        Expected number of items; without it no percentage or ETA is shown.
+    interval : float
+        Minimum seconds between two lines.
+    unit : str
+        Name of the counted items.
+    stream : file
+        Where the lines are written (stderr by default).
+    """
+
+    def __init__(self, total: Optional[int] = None, interval: float = 10.0, unit: str = "docs",
+                 stream: Optional[TextIO] = None) -> None:
+        self.total = total
+        self.interval = interval
+        self.unit = unit
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self._start = time.perf_counter()
+        self._next = self._start + interval
+
+    def update(self, n: int = 1) -> None:
+        self.done += n
+        now = time.perf_counter()
+        if now >= self._next:
+            self._next = now + self.interval
+            self.report(now)
+
+    def line(self, now: Optional[float] = None) -> str:
+        elapsed = (now or time.perf_counter()) - self._start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            text = f"{self.done}/{self.total} {self.unit} ({100.0 * self.done / self.total:.1f}%), {rate:.1f} {self.unit}/s"
+            if rate > 0 and self.done < self.total:
+                text += f", ETA {_format_duration((self.total - self.done) / rate)}"
+            return text
+        return f"{self.done} {self.unit}, {rate:.1f} {self.unit}/s, elapsed {_format_duration(elapsed)}"
+
+    def report(self, now: Optional[float] = None) -> None:
+        print(self.line(now), file=self.stream, flush=True)
+
+    def close(self) -> None:
+        self.report()
@@ -1,12 +1,15 @@
-import time
-from functools import wraps
-
-def measure_time(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.perf_counter()
-        result = func(*args, **kwargs)
-        end_time = time.perf_counter()
-        print(f"Execution time: {end_time - start_time:.3f} seconds")
-        return result
-    return wrapper
+from typing import Callable, Optional
+
+from .metrics import timed
+
+
+def measure_time(func: Optional[Callable] = None, *, name: str = "function_seconds"):
+    """Time every call of the decorated function into the metrics registry.
+
+    The duration is recorded in histogram `name`, labelled with the function's
+    qualified name, instead of being printed; nothing is recorded until
+    `metrics.enable_metrics()` has been called. Usable as `@measure_time` or
+    `@measure_time(name=...)`.
+    """
+    decorator = timed(name)
+    return decorator(func) if func is not None else decorator
@@ -0,0 +1,291 @@
+import json
+import os
+import re
+import sys
+import threading
+import timeit
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from text_to_graph_knowledge.entity_linking import EntityLinker
+from text_to_graph_knowledge.kb_store import trigrams
+from text_to_graph_knowledge.named_entity_recognition import NERModel, default_rule_based_ner
+
+
+def test_predict_document_keeps_match_after_boundary_crossing_one():
+    ner = NERModel(rules=[(r"\b[A-Z][a-z]+\.? [A-Z][a-z]+\b", "PERSON")])
+    text = "They bought Corp. Carol White left."
+    assert ner.predict_document(text).by_sentence() == [[], [("Carol White", "PERSON")]]
+    assert ner.predict("Carol White left.") == [("Carol White", "PERSON")]
+
+
+def test_predict_batch_matches_per_sentence_predict():
+    ner = default_rule_based_ner()
+    texts = ["Alice", "Bob Smith works here."]
+    assert ner.predict_batch(texts) == [ner.predict(t) for t in texts]
+    assert ner.predict_batch(texts)[1] == [("Bob Smith", "PERSON")]
+
+
+def test_predict_document_is_faster_than_per_sentence_predict():
+    ner = default_rule_based_ner()
+    words = "the cat Alice Smith went to Paris in 1999 and Bob met Carol White at Acme Corp. yesterday".split()
+    sentences = [" ".join(words[(i * 7 + j * 3) % len(words)] for j in range(3 + i % 12)).capitalize() + "." for i in range(5000)]
+    text = " ".join(sentences)
+    spans, pos = [], 0
+    for sentence in sentences:
+        spans.append((pos, pos + len(sentence)))
+        pos += len(sentence) + 1
+
+    assert ner.predict_document(text, spans).by_sentence() == [ner.predict(s) for s in sentences]
+    # interleaved, so both paths see the same machine load
+    document, per_sentence = [], []
+    for _ in range(7):
+        document.append(timeit.timeit(lambda: ner.predict_document(text, spans), number=1))
+        per_sentence.append(timeit.timeit(lambda: [ner.predict(s) for s in sentences], number=1))
+    assert min(document) < min(per_sentence)
+
+
+def test_linker_candidates_match_exhaustive_trigram_counts():
+    names = [f"{a} {b}" for a in ("Anna", "Anton", "Antonia", "Bruno", "Bernard") for b in ("Smith", "Smyth", "Schmidt", "Stone")]
+    mention = "Antonia Smih"
+    grams = trigrams(mention)
+    shared = sorted((len(grams & trigrams(n)) for n in names), reverse=True)
+
+    linker = EntityLinker({name: {} for name in names}, max_candidates=5)
+    assert [len(grams & trigrams(n)) for n in linker.candidates(mention)] == shared[:5]
+    # common trigrams only re-rank the candidates found through rarer ones
+    linker = EntityLinker({name: {} for name in names}, max_candidates=5, max_postings=3)
+    assert linker.link(mention)[0] == "Antonia Smith"
+
+
+class _StubOllama(BaseHTTPRequestHandler):
+    """Ollama `/api/generate` stub: fails the first request, drops the sections of batches mentioning "garbled"."""
+
+    prompts = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            self.prompts.append(body["prompt"])
+            first = len(self.prompts) == 1
+        if first:
+            self.send_response(500)
+            self.end_headers()
+            return
+        sentences = re.findall(r"^\d+\. (.*)$", body["prompt"], re.MULTILINE)
+        if len(sentences) > 1 and any("garbled" in s for s in sentences):
+            answer = "MATCH (n) RETURN n"
+        else:
+            answer = "\n".join(f"### Sentence {i}\nCREATE (:S {{text: '{s}'}})" for i, s in enumerate(sentences, 1))
+        payload = json.dumps({"model": body["model"], "response": answer, "done": True}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class _HTTPClient:
+    """Minimal `ollama.Client`-style client for the stub server."""
+
+    def __init__(self, host):
+        self.host = host
+
+    def generate(self, model, prompt, options=None):
+        request = urllib.request.Request(
+            f"{self.host}/api/generate",
+            data=json.dumps({"model": model, "prompt": prompt, "options": options, "stream": False}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            error = RuntimeError(f"HTTP {e.code}")
+            error.status_code = e.code
+            raise error
+
+
+def test_sentence_to_cypher_batches_splits_and_retries_against_stub_server():
+    from src.llm_extraction.sentence_to_cypher import SentenceToCypherExtractor
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        extractor = SentenceToCypherExtractor(
+            _HTTPClient(f"http://127.0.0.1:{server.server_address[1]}"), model="stub", max_in_flight=1,
+            num_ctx=180, output_tokens_per_sentence=40, backoff=0, modelfile=os.devnull,
+        )
+        sentences = ["Alice met Bob.", "Bob left.", "A garbled one.", "Carol stayed.", "Dan came.", "Eve went."]
+        batches = list(extractor.pack_batches(sentences))
+        assert 1 < len(batches) < len(sentences)
+
+        records = extractor.extract(sentences)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert [r["sentence"] for r in records] == sentences
+    assert [r["response"] for r in records] == [f"CREATE (:S {{text: '{s}'}})" for s in sentences]
+    # one failed request, one request per batch, then one per sentence of the batch that could not be split
+    garbled = next(b for b in batches if "A garbled one." in b)
+    assert len(garbled) > 1
+    assert len(_StubOllama.prompts) == 1 + len(batches) + len(garbled)
+
+
+def test_iter_json_array_refills_numbers_cut_at_the_chunk_edge():
+    import io
+    from run_pipeline import _iter_json_array
+
+    items = [1.5, 2, -2.25e-10, {"a": [3e300, True]}, "x", 12345678901, None]
+    text = json.dumps(items)
+    for chunk_size in (1, 2, 3, 5, 7, 64):
+        assert list(_iter_json_array(io.StringIO(text), chunk_size)) == items
+
+
+def test_cypher_exporter_batches_rows_and_rewrites_the_same_graph_on_rerun():
+    from text_to_graph_knowledge.graph_export import CypherExporter, GraphAccumulator, RecordingDriver
+
+    records = [
+        {
+            "doc_index": i,
+            "sentence_spans": [[0, 10]],
+            "entities_by_sentence": [[[f"Person {i}", "PERSON"], ["Acme", "ORG"]]],
+            "linked_entities": {"Acme": ["Q1", 1.0]},
+            "relations": [[f"Person {i}", "works for", "Acme"]],
+        }
+        for i in range(5)
+    ]
+    graph = GraphAccumulator().add_records(records, source="results.jsonl")
+    assert graph.stats() == {"entities": 6, "documents": 5, "relations": 5, "mentions": 10}
+
+    driver = RecordingDriver()
+    exporter = CypherExporter(driver, batch_size=2)
+    n_batches = exporter.write(graph)
+    data = [(q, p["rows"]) for q, p in driver.queries if "rows" in p]
+    # PERSON and ORG entities, documents, relations and mentions: ceil(5/2) + 1 + 3 + 3 + ceil(10/2)
+    assert n_batches == len(data) == 15
+    assert all(len(rows) <= 2 for _, rows in data)
+    # nodes are written before the edges that MATCH them
+    is_edge = ["MATCH" in q for q, _ in data]
+    assert is_edge == sorted(is_edge)
+    # every row of the graph is sent exactly once
+    sent = [row for _, rows in data for row in rows]
+    assert len(sent) == 6 + 5 + 5 + 10
+    assert {"start": "Person 3", "end": "Q1", "count": 1} in sent
+
+    # edge counts are SET, never incremented, so a second export sends the same statements
+    exporter.write(graph, create_schema=False)
+    rerun = [(q, p["rows"]) for q, p in driver.queries if "rows" in p][len(data):]
+    assert rerun == data
+
+
+def test_sql_knowledge_base_upserts_and_streams_against_sqlite():
+    pytest.importorskip("mysql.connector")
+    from mysql_db import SQLiteDatabase, SQLKnowledgeBase
+
+    db = SQLiteDatabase()
+    kb = SQLKnowledgeBase(db, cache_size=2, create=True)
+    assert kb.load({"Alice Smith": {"type": "PERSON", "aliases": ["Alice"]}, "Acme": {"type": "ORG"}}, chunk_size=1) == 2
+    version = kb.version()
+
+    # a second load overwrites rows by key instead of duplicating them
+    kb.load([("Acme", {"type": "COMPANY"}), ("Bob Jones", {"type": "PERSON"})], chunk_size=1)
+    assert len(kb) == 3
+    assert kb["Acme"] == {"type": "COMPANY"}
+    assert kb.version() != version
+    assert sorted(kb.iter_names(batch_size=2)) == ["Acme", "Alice Smith", "Bob Jones"]
+    assert list(kb.iter_aliases(batch_size=1)) == [("alice", "Alice Smith")]
+
+    assert kb.get_many(["Bob Jones", "Nobody", "Bob Jones"]) == {"Bob Jones": {"type": "PERSON"}}
+    assert "Nobody" not in kb and kb.get("Nobody") is None
+    # the LRU keeps at most cache_size lookups, misses included
+    assert len(kb._cache) == 2
+
+    # a read-only handle runs no DDL and sees the same rows
+    reader = SQLKnowledgeBase(db)
+    assert reader.get("Alice Smith") == {"type": "PERSON", "aliases": ["Alice"]}
+    assert reader.version() == kb.version()
+
+
+def test_record_stream_round_trips_jsonl_records(tmp_path):
+    pytest.importorskip("msgpack")
+    from text_to_graph_knowledge.record_stream import RecordStreamReader, RecordStreamWriter, is_record_stream
+
+    records = []
+    for i in range(7):
+        sentences = [f"Alice {i} met Bob.", "Bob works at Acme.", "Bob works at Acme."]
+        records.append({
+            "doc_index": i,
+            "text": " ".join(sentences),
+            "sentences": sentences,
+            "entities_by_sentence": [[["Alice", "PERSON"], ["Bob", "PERSON"]], [["Acme", "ORG"]], []],
+            "coref_clusters": {"0": ["Bob", "he"]} if i % 2 else {},
+            "linked_entities": {"Acme": ["Q1", 0.9]},
+            "cooccurrence_top_edges": [[["bob", "works"], 2]],
+            "relations": [["Bob", "works_for", "Acme"]] * (i % 3),
+        })
+    # what the JSONL output would give back
+    expected = [json.loads(json.dumps(r)) for r in records]
+
+    path = str(tmp_path / "results.t2g")
+    with RecordStreamWriter(path, flush_every=3) as writer:
+        for record in records:
+            writer.write(record)
+    assert is_record_stream(path)
+    assert not is_record_stream(__file__)
+
+    reader = RecordStreamReader(path)
+    assert list(reader) == expected
+    assert [len(batch["doc_index"]) for batch in reader.iter_batches(["doc_index"])] == [3, 3, 1]
+    assert list(reader.iter_records(["relations", "sentence_spans"]))[4] == {
+        "relations": [["Bob", "works_for", "Acme"]],
+        "sentence_spans": [[0, 16], [17, 35], [36, 54]],
+    }
+    with pytest.raises(ValueError):
+        list(reader.iter_records(["no_such_column"]))
+
+
+def test_artifacts_are_reused_until_the_rules_they_depend_on_change(tmp_path):
+    from run_pipeline import build_components, process_document
+
+    text = "Alice Smith works at Bob Jones. Carol White manages Dan Brown."
+    works = [["PERSON", "works_for", "PERSON", ["{L} works at {R}"]]]
+    manages = works + [["PERSON", "manages", "PERSON", ["{L} manages {R}"]]]
+    rules_path = tmp_path / "rules.json"
+    store_path = str(tmp_path / "artifacts.sqlite")
+
+    def run(rules):
+        rules_path.write_text(json.dumps(rules), encoding="utf-8")
+        components = build_components(rules_path=str(rules_path), artifacts_path=store_path)
+        record = process_document(components, 0, text)
+        store = components["artifacts"]
+        store.close()
+        # reused outputs come back from JSON, so compare records as the output file holds them
+        return json.loads(json.dumps(record)), set(store.reused), set(store.computed)
+
+    first, reused, computed = run(works)
+    assert not reused and computed == {"ner", "coref", "linking", "cooccurrence", "relations"}
+
+    second, reused, computed = run(works)
+    assert second == first
+    assert not computed and reused == {"ner", "coref", "linking", "cooccurrence", "relations"}
+
+    # a new relation rule only invalidates relation extraction
+    third, reused, computed = run(manages)
+    assert computed == {"relations"}
+    assert reused == {"ner", "coref", "linking", "cooccurrence"}
+    assert {tuple(r) for r in third["relations"]} - {tuple(r) for r in first["relations"]} == {
+        ("Carol White", "manages", "Dan Brown")
+    }